@@ -0,0 +1,230 @@
+"""Batch renderer for families of stepped-cylinder drawings.
+
+Reads a file of part specs and renders every part with the three-view
+drawing from stepped_cylinder_three_view_gemini.py on a pool of worker
+processes. For PNG/PDF each worker owns one Figure on an Agg canvas that
+is cleared after every part, so no pyplot figures pile up over long runs.
+SVG and DXF are written by vector_writer.py without matplotlib.
+
+Rendered drawings go through the content-addressed render cache
+(render_cache.py): parts whose spec, style, DPI and drawing code are
+unchanged are copied from the cache instead of being sent to a worker.
+
+Spec files:
+    .jsonl - one part per line: {"part": "name", "sections": [[length, d_major, d_minor, start_z, threaded, label], ...]}
+    .csv   - one section per row, columns: part,length,d_major,d_minor,start_z,threaded,thread_label
+    .scad  - an OpenSCAD model, or a directory of them; sections extracted by scad_sections.py
+
+With --profile, every worker records its phase timings and counters
+(profiling.py) and sends them back with each part; the merged run is
+written as a Chrome trace and summarized on stderr.
+
+Usage:
+    python batch_drawings.py parts.jsonl -o drawings --workers 8 --format png
+    python batch_drawings.py parts.jsonl -o drawings --profile trace.json
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import shutil
+import time
+
+import dimension_layout
+import drafting
+import profiling
+import scad_sections
+import stepped_cylinder_three_view_gemini
+import stepped_geometry
+import vector_writer
+from render_cache import DEFAULT_CACHE_DIR, RenderCache, cache_key, source_digest
+from stepped_cylinder_three_view_gemini import FIGSIZE, build_stepped_drawing, render_style
+
+SOURCES = [__file__, dimension_layout.__file__, drafting.__file__, stepped_geometry.__file__,
+           stepped_cylinder_three_view_gemini.__file__, vector_writer.__file__]
+VECTOR_FORMATS = ('svg', 'dxf')  # written by vector_writer.py; other formats go through matplotlib
+
+# Per-worker state (set up once by init_worker)
+_figure = None
+_cache = None
+
+
+def _parse_bool(value):
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y')
+
+
+def normalize_sections(rows):
+    """Converts raw spec rows into sections_data tuples."""
+    sections = []
+    for row in rows:
+        length, d_major, d_minor, start_z, threaded, label = row
+        threaded = threaded if isinstance(threaded, bool) else _parse_bool(threaded)
+        sections.append((float(length), float(d_major), float(d_minor), float(start_z),
+                         threaded, label if threaded and label else None))
+    return sections
+
+
+def read_jsonl_specs(path):
+    with open(path, encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            spec = json.loads(line)
+            yield spec.get('part', f'part_{line_no:05d}'), normalize_sections(spec['sections'])
+
+
+def read_csv_specs(path):
+    """Rows of one part must be contiguous in the file."""
+    with open(path, newline='', encoding='utf-8') as f:
+        part, rows = None, []
+        for row in csv.DictReader(f):
+            if row['part'] != part and rows:
+                yield part, normalize_sections(rows)
+                rows = []
+            part = row['part']
+            rows.append((row['length'], row['d_major'], row['d_minor'], row['start_z'],
+                         row['threaded'], row.get('thread_label') or None))
+        if rows:
+            yield part, normalize_sections(rows)
+
+
+def read_scad_specs(path):
+    """Yields (part name, sections_data) for a .scad file or each .scad file of a directory."""
+    results = scad_sections.extract_directory(path) if os.path.isdir(path) else {path: scad_sections.extract(path)}
+    for scad_path, result in results.items():
+        part = os.path.splitext(os.path.basename(scad_path))[0]
+        if result.get('error') or not result['sections']:
+            print(f"Skipping {part}: {result.get('error') or 'no axial sections'}")
+            continue
+        yield part, result['sections']
+
+
+def read_specs(path):
+    """Yields (part name, sections_data) from a .jsonl, .csv or .scad spec file (or a directory of .scad files)."""
+    if os.path.isdir(path) or path.endswith('.scad'):
+        return read_scad_specs(path)
+    if path.endswith('.csv'):
+        return read_csv_specs(path)
+    return read_jsonl_specs(path)
+
+
+def init_worker(cache_dir=None, profile=False):
+    global _cache
+    _cache = RenderCache(cache_dir) if cache_dir else None
+    if profile:
+        profiling.enable()
+        profiling.reset()  # a forked worker starts with a copy of the parent's data
+
+
+def worker_figure():
+    """Returns the worker's reusable Figure/Agg canvas (no pyplot), creating it on first use."""
+    global _figure
+    if _figure is None:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        _figure = Figure(figsize=FIGSIZE)
+        FigureCanvasAgg(_figure)
+    return _figure
+
+
+def render_part(job):
+    """Renders one part on the worker's figure; returns (part, path, seconds, error, profile).
+
+    profile is the worker's profiling data for this part (None unless profiling).
+    """
+    part, sections, out_path, dpi, key = job
+    fmt = os.path.splitext(out_path)[1].lstrip('.')
+    t0 = time.perf_counter()
+    try:
+        with profiling.phase('part', part=part):
+            drawing = build_stepped_drawing(sections)
+            if fmt in VECTOR_FORMATS:
+                vector_writer.write_drawing(drawing, out_path)
+            else:
+                with profiling.phase('setup'):
+                    figure = worker_figure()
+                try:
+                    drawing.draw(figure.add_subplot())
+                    with profiling.phase('save', format=fmt):
+                        figure.savefig(out_path, bbox_inches='tight', dpi=dpi)
+                    profiling.count_written(out_path)
+                finally:
+                    figure.clear()
+        if _cache and key:
+            _cache.put(key, fmt, out_path)
+        error = None
+    except Exception as exc:
+        error = f'{type(exc).__name__}: {exc}'
+    return part, out_path, time.perf_counter() - t0, error, profiling.drain()
+
+
+def iter_jobs(specs, out_dir, fmt, dpi, cache, stats):
+    """Yields render jobs for cache misses; cache hits are copied to out_dir here."""
+    style = dict(render_style(), source=source_digest(SOURCES)) if cache else None
+    for part, sections in specs:
+        out_path = os.path.join(out_dir, f'{part}.{fmt}')
+        key = cache_key(sections, style, dpi, fmt) if cache else None
+        hit = cache.get(key, fmt) if cache else None
+        if hit:
+            shutil.copyfile(hit, out_path)
+            stats['hits'] += 1
+            continue
+        yield part, sections, out_path, dpi, key
+
+
+def run_batch(spec_path, out_dir, workers=None, fmt='png', dpi=100, chunksize=8, maxtasksperchild=None,
+              cache_dir=None, profile=None):
+    """Renders every part in spec_path into out_dir; returns the list of failures.
+
+    profile is the path of a Chrome trace of the run (see profiling.py).
+    """
+    if profile:
+        profiling.enable()
+    os.makedirs(out_dir, exist_ok=True)
+    cache = RenderCache(cache_dir) if cache_dir else None
+    stats = {'hits': 0}
+    jobs = iter_jobs(read_specs(spec_path), out_dir, fmt, dpi, cache, stats)
+    failures = []
+    count = 0
+    t0 = time.perf_counter()
+    with multiprocessing.Pool(workers, initializer=init_worker, initargs=(cache_dir, profiling.enabled()),
+                              maxtasksperchild=maxtasksperchild) as pool:
+        for part, path, seconds, error, part_profile in pool.imap_unordered(render_part, jobs, chunksize=chunksize):
+            profiling.merge(part_profile)
+            count += 1
+            if error:
+                failures.append((part, error))
+                print(f'FAILED {part}: {error}')
+    if cache:
+        cache.evict()
+    elapsed = time.perf_counter() - t0
+    total = count + stats['hits']
+    print(f'Rendered {count - len(failures)}/{count} parts, {stats["hits"]} cached, in {elapsed:.1f} s '
+          f'({total / elapsed if elapsed else 0:.1f} parts/s)')
+    if profile:
+        profiling.write_trace(profile)
+        print(profiling.summary_table())
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Render stepped-cylinder drawings for a file of part specs.')
+    parser.add_argument('specs', help='.jsonl or .csv part spec file, .scad file or directory of .scad files')
+    parser.add_argument('-o', '--out-dir', default='drawings')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--format', default='png', choices=['png', 'pdf', 'svg', 'dxf'])
+    parser.add_argument('--dpi', type=int, default=100)
+    parser.add_argument('--chunksize', type=int, default=8)
+    parser.add_argument('--maxtasksperchild', type=int, default=None,
+                        help='recycle workers after this many chunks')
+    parser.add_argument('--cache-dir', default=os.environ.get('SHOCK_RENDER_CACHE', DEFAULT_CACHE_DIR),
+                        help='render cache directory (empty string disables the cache)')
+    parser.add_argument('--profile', metavar='TRACE', help='write a Chrome trace of phase timings to this file')
+    args = parser.parse_args()
+
+    failures = run_batch(args.specs, args.out_dir, args.workers, args.format, args.dpi,
+                         args.chunksize, args.maxtasksperchild, args.cache_dir, args.profile)
+    raise SystemExit(1 if failures else 0)
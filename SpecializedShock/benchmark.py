@@ -0,0 +1,284 @@
+"""Benchmarks for the four drawing generators.
+
+Runs simple_cylinder.py, simple_cylinder_gemini.py,
+stepped_cylinder_three_view.py and stepped_cylinder_three_view_gemini.py
+through their render() functions over a sweep of section counts, DPIs
+and output formats. Every run happens in a fresh Python process so import
+cost and peak RSS are measured honestly, and records:
+
+    import_s    importing matplotlib.pyplot and the generator module
+    geometry_s  time inside the generator's geometry functions (GEOMETRY) during render()
+    artists_s   creating matplotlib artists (render() minus geometry and savefig)
+    savefig_s   Figure.savefig
+    total_s     geometry + artists + savefig
+    peak_rss_mb, artists (count on the axes at save time), output_bytes
+
+The simple cylinders have fixed dimensions, so they only vary with DPI and
+format; their geometry is inline in render() and counted as artists_s.
+Results go to a JSON file (with the git commit) so runs from two commits
+can be compared; compare exits non-zero when a run slowed down, its peak
+RSS or its artist count grew by more than the threshold.
+
+Usage:
+    python benchmark.py run -o bench.json --sections 5 50 500 --dpi 100 300 --format png svg
+    python benchmark.py compare before.json bench.json --threshold 0.10
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+GENERATORS = ['simple_cylinder', 'simple_cylinder_gemini', 'stepped_cylinder_three_view',
+              'stepped_cylinder_three_view_gemini']
+SECTIONED = {'stepped_cylinder_three_view', 'stepped_cylinder_three_view_gemini'}
+# Functions of each generator module whose time counts as geometry (looked up by render() at call time)
+GEOMETRY = {
+    'stepped_cylinder_three_view': ['half_profile', 'section_hatch', 'hatch_circle'],
+    'stepped_cylinder_three_view_gemini': ['build_stepped_drawing'],
+}
+PHASES = ['import_s', 'geometry_s', 'artists_s', 'savefig_s', 'total_s']
+RUN_KEYS = ['generator', 'sections', 'dpi', 'format']
+MIN_DELTA = 0.005     # seconds; smaller differences are noise
+MIN_RSS_DELTA = 5.0   # MB
+
+
+# --- Synthetic parts ---
+def synthetic_sections(n, pitch=1.25, length=80.0):
+    """A stepped shaft of n sections alternating between three diameters, every third one threaded."""
+    step = length / n
+    rows = []
+    for i in range(n):
+        d_major = (8.0, 10.0, 9.0)[i % 3]
+        threaded = i % 3 == 1
+        rows.append((step, d_major, round(d_major - 1.22 * pitch, 3) if threaded else d_major, i * step,
+                     threaded, f'M{d_major:g}x{pitch:g}' if threaded else None))
+    return rows
+
+
+# --- One run (child process) ---
+def count_artists(figure):
+    return sum(len(ax.lines) + len(ax.patches) + len(ax.collections) + len(ax.texts) + len(ax.artists)
+               for ax in figure.axes)
+
+
+def run_one(config):
+    """Runs one configuration in this process and returns its measurements."""
+    t0 = time.perf_counter()
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib.figure import Figure
+    module = __import__(config['generator'])
+    import_s = time.perf_counter() - t0
+
+    # Time savefig and count artists from inside render()
+    timings = {'savefig_s': 0.0, 'artists': 0}
+    original_savefig = Figure.savefig
+
+    def timed_savefig(self, *args, **kwargs):
+        timings['artists'] = count_artists(self)
+        t = time.perf_counter()
+        result = original_savefig(self, *args, **kwargs)
+        timings['savefig_s'] += time.perf_counter() - t
+        return result
+
+    Figure.savefig = timed_savefig
+    fd, output = tempfile.mkstemp(suffix='.' + config['format'])
+    os.close(fd)
+    try:
+        geometry_s, render_s = render_generator(module, config, output)
+        output_bytes = os.path.getsize(output)
+    finally:
+        Figure.savefig = original_savefig
+        os.remove(output)
+        plt.close('all')
+
+    artists_s = max(render_s - geometry_s - timings['savefig_s'], 0.0)
+    return {
+        'import_s': import_s,
+        'geometry_s': geometry_s,
+        'artists_s': artists_s,
+        'savefig_s': timings['savefig_s'],
+        'total_s': geometry_s + artists_s + timings['savefig_s'],
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'artists': timings['artists'],
+        'output_bytes': output_bytes,
+    }
+
+
+def render_generator(module, config, output):
+    """Renders with one generator; returns (geometry seconds, render() seconds).
+
+    Geometry is the time spent in the module's GEOMETRY functions while
+    render() runs, so it is the geometry that is actually drawn.
+    """
+    name, dpi = config['generator'], config['dpi']
+    geometry = {'s': 0.0}
+
+    def timed(func):
+        def wrapper(*args, **kwargs):
+            t = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                geometry['s'] += time.perf_counter() - t
+        return wrapper
+
+    originals = {attr: getattr(module, attr) for attr in GEOMETRY.get(name, [])}
+    for attr, func in originals.items():
+        setattr(module, attr, timed(func))
+    try:
+        t = time.perf_counter()
+        if name not in SECTIONED:
+            module.render(output, dpi=dpi)
+        elif name == 'stepped_cylinder_three_view_gemini':
+            module.render(output, synthetic_sections(config['sections']), dpi=dpi)
+        else:
+            rows = synthetic_sections(config['sections'])
+            module.render(output, [{'len': r[0], 'dia': r[1]} for r in rows], dpi=dpi)
+        render_s = time.perf_counter() - t
+    finally:
+        for attr, func in originals.items():
+            setattr(module, attr, func)
+    return geometry['s'], render_s
+
+
+# --- Sweep (parent process) ---
+def configurations(generators, section_counts, dpis, formats):
+    for name in generators:
+        counts = section_counts if name in SECTIONED else [None]
+        for n, dpi, fmt in itertools.product(counts, dpis, formats):
+            yield {'generator': name, 'sections': n, 'dpi': dpi, 'format': fmt}
+
+
+def measure(config, repeat=1):
+    """Runs a configuration in fresh processes; keeps the fastest of each phase."""
+    best = None
+    for _ in range(repeat):
+        # With the render cache on, every repeat after the first would be a cache hit
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), 'run-one', json.dumps(config)],
+                              capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+                              env=dict(os.environ, SHOCK_RENDER_CACHE=''))
+        if proc.returncode != 0:
+            lines = proc.stderr.strip().splitlines()
+            return dict(config, error=lines[-1] if lines else f'exit status {proc.returncode}')
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        if best is None:
+            best = result
+        else:
+            for key in PHASES + ['peak_rss_mb']:
+                best[key] = min(best[key], result[key])
+    return dict(config, **{k: round(v, 5) if isinstance(v, float) else v for k, v in best.items()})
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_suite(output, generators=GENERATORS, section_counts=(5, 50, 500), dpis=(100,), formats=('png',), repeat=1):
+    import matplotlib
+
+    results = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'matplotlib': matplotlib.__version__,
+        'machine': platform.machine(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'runs': [],
+    }
+    for config in configurations(generators, section_counts, dpis, formats):
+        run = measure(config, repeat)
+        results['runs'].append(run)
+        if 'error' in run:
+            print(f"{config['generator']:36} {run_label(config):28} FAILED: {run['error']}")
+        else:
+            print(f"{config['generator']:36} {run_label(config):28} total {run['total_s'] * 1000:8.1f} ms  "
+                  f"import {run['import_s'] * 1000:6.0f} ms  {run['artists']:5d} artists  "
+                  f"{run['output_bytes'] / 1024:7.1f} kB  {run['peak_rss_mb']:5.0f} MB")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=1)
+    print(f'Results saved as {output}')
+    return results
+
+
+def run_label(run):
+    parts = [f"n={run['sections']}" if run.get('sections') else '', f"{run['dpi']}dpi", run['format']]
+    return ' '.join(p for p in parts if p)
+
+
+# --- Compare ---
+def compare(before_path, after_path, threshold=0.10, phases=('total_s', 'import_s')):
+    """Prints per-run changes; returns the list of regressions beyond threshold.
+
+    Besides the timed phases, peak RSS and the artist count are compared:
+    growth beyond threshold (and MIN_RSS_DELTA for RSS) is a regression too.
+    """
+    with open(before_path, encoding='utf-8') as f:
+        before = json.load(f)
+    with open(after_path, encoding='utf-8') as f:
+        after = json.load(f)
+    old = {tuple(r.get(k) for k in RUN_KEYS): r for r in before['runs'] if 'error' not in r}
+    print(f"{before.get('commit')} -> {after.get('commit')}")
+    regressions = []
+    for run in after['runs']:
+        key = tuple(run.get(k) for k in RUN_KEYS)
+        if 'error' in run or key not in old:
+            continue
+        changes = []
+        for phase in phases:
+            a, b = old[key][phase], run[phase]
+            ratio = (b - a) / a if a else 0.0
+            flag = ratio > threshold and b - a > MIN_DELTA
+            if flag:
+                regressions.append((run['generator'], run_label(run), phase, a, b))
+            changes.append(f"{phase[:-2]} {a * 1000:7.1f} -> {b * 1000:7.1f} ms ({ratio:+6.1%}){' !' if flag else '  '}")
+        for field, label, unit, min_delta in (('peak_rss_mb', 'rss', ' MB', MIN_RSS_DELTA), ('artists', 'artists', '', 0)):
+            a, b = old[key].get(field), run.get(field)
+            if a is None or b is None:
+                continue
+            ratio = (b - a) / a if a else 0.0
+            flag = ratio > threshold and b - a > min_delta
+            if flag:
+                regressions.append((run['generator'], run_label(run), field, a, b))
+            changes.append(f"{label} {a:.5g} -> {b:.5g}{unit}{' !' if flag else '  '}")
+        print(f"{run['generator']:36} {run_label(run):28} " + '  '.join(changes))
+    if regressions:
+        print(f'{len(regressions)} regressions above {threshold:.0%}')
+    return regressions
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['run-one']:
+        print(json.dumps(run_one(json.loads(sys.argv[2]))))
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description='Benchmark the drawing generators.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help='run the benchmark sweep')
+    run.add_argument('-o', '--output', default='benchmark.json')
+    run.add_argument('--generators', nargs='+', choices=GENERATORS, default=GENERATORS)
+    run.add_argument('--sections', nargs='+', type=int, default=[5, 50, 500])
+    run.add_argument('--dpi', nargs='+', type=int, default=[100])
+    run.add_argument('--format', nargs='+', default=['png'], choices=['png', 'svg', 'pdf'])
+    run.add_argument('--repeat', type=int, default=1, help='runs per configuration (fastest kept)')
+    cmp = commands.add_parser('compare', help='compare two result files')
+    cmp.add_argument('before')
+    cmp.add_argument('after')
+    cmp.add_argument('--threshold', type=float, default=0.10, help='allowed slowdown (0.10 = 10%%)')
+    cmp.add_argument('--phases', nargs='+', default=['total_s', 'import_s'], choices=PHASES)
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        run_suite(args.output, args.generators, args.sections, args.dpi, args.format, args.repeat)
+    else:
+        sys.exit(1 if compare(args.before, args.after, args.threshold, args.phases) else 0)
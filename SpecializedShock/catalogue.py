@@ -0,0 +1,174 @@
+"""Catalogue sheets: many parts per page, streamed to a multi-page PDF.
+
+Parts are read one at a time from a spec file (see batch_drawings.py) and
+packed onto fixed-size sheets in a grid of cells. Each part gets the
+three-view drawing from stepped_cylinder_three_view_gemini.py at the
+largest standard scale that fits its cell (ISO 5455: 5:1, 2:1, 1:1, 1:2,
+...), laid out for that scale so text stays at its point size, plus a
+small title block with name, scale and main sizes. A sheet title block
+and border frame every page.
+
+One sheet Drawing and one Figure exist at a time: a sheet is built,
+written as the next PDF page (or the next SVG file of a series) and
+released before the next sheet is read, so memory stays bounded by one
+sheet however long the catalogue is.
+
+Usage:
+    python catalogue.py parts.jsonl -o catalogue.pdf --sheet A3 --grid 2x2
+    python catalogue.py parts.csv -o sheets/catalogue.svg     # catalogue-001.svg, catalogue-002.svg, ...
+"""
+import argparse
+import itertools
+import os
+import resource
+import time
+
+from drafting import Drawing
+from stepped_cylinder_three_view_gemini import build_stepped_drawing
+from stepped_geometry import SectionTable
+
+SHEET_SIZES = {'A4': (297.0, 210.0), 'A3': (420.0, 297.0), 'A2': (594.0, 420.0), 'A1': (841.0, 594.0)}  # landscape, mm
+STANDARD_SCALES = [5.0, 2.0, 1.0, 1 / 2, 1 / 5, 1 / 10, 1 / 20, 1 / 50, 1 / 100]
+PT_MM = 25.4 / 72          # one point in mm
+BORDER = (20.0, 10.0)      # frame inset: left (binding edge), other sides
+SHEET_BLOCK = (180.0, 14.0)  # sheet title block (width, height) in the bottom right corner
+PART_BLOCK_HEIGHT = 9.0    # part title block at the bottom of each cell
+CELL_PADDING = 4.0
+
+
+def format_scale(scale):
+    return f'{scale:g}:1' if scale >= 1 else f'1:{1 / scale:g}'
+
+
+def fit_part(sections, width, height):
+    """Returns (drawing, scale): the part laid out at the largest standard scale that fits width x height mm."""
+    drawing = build_stepped_drawing(sections, PT_MM)
+    x_min, x_max, y_min, y_max = drawing.limits
+    estimate = min(width / (x_max - x_min), height / (y_max - y_min))
+    # Text does not shrink with the scale, so the fit at 1:1 is only an estimate; verify each candidate
+    candidates = [s for s in STANDARD_SCALES if s <= estimate * 2] or STANDARD_SCALES[-1:]
+    for scale in candidates:
+        drawing = build_stepped_drawing(sections, PT_MM / scale)
+        x_min, x_max, y_min, y_max = drawing.limits
+        if (x_max - x_min) * scale <= width and (y_max - y_min) * scale <= height:
+            break
+    return drawing, scale
+
+
+def frame(drawing, x0, y0, x1, y1, style='outline'):
+    drawing.add_line(style, [x0, x1], [y0, y0])
+    drawing.add_line(style, [x1, x1], [y0, y1])
+    drawing.add_line(style, [x1, x0], [y1, y1])
+    drawing.add_line(style, [x0, x0], [y1, y0])
+
+
+def add_part(sheet, name, sections, cell):
+    """Places one part and its title block in a cell (x0, y0, x1, y1); returns the scale used."""
+    x0, y0, x1, y1 = cell
+    area = (x0 + CELL_PADDING, y0 + PART_BLOCK_HEIGHT + CELL_PADDING, x1 - CELL_PADDING, y1 - CELL_PADDING)
+    drawing, scale = fit_part(sections, area[2] - area[0], area[3] - area[1])
+    d_x0, d_x1, d_y0, d_y1 = drawing.limits
+    offset = ((area[0] + area[2]) / 2 - (d_x0 + d_x1) / 2 * scale, (area[1] + area[3]) / 2 - (d_y0 + d_y1) / 2 * scale)
+    sheet.add_drawing(drawing, scale, offset)
+
+    # Part title block
+    table = SectionTable(sections)
+    frame(sheet, x0, y0, x1, y0 + PART_BLOCK_HEIGHT, 'thin')
+    y_text = y0 + PART_BLOCK_HEIGHT / 2
+    sheet.add_text(x0 + 2, y_text, name, ha='left', va='center', fontsize=9, fontweight='bold')
+    sheet.add_text(x1 - 2, y_text, f'L {table.total_length:g}   Ø{table.max_diameter:g} max   '
+                   f'{len(table)} sections   {int(table.threaded.sum())} threads   SCALE {format_scale(scale)}',
+                   ha='right', va='center', fontsize=7)
+    return scale
+
+
+def build_sheet(parts, number, sheet_size='A3', grid=(2, 2), title='Shock parts catalogue'):
+    """Builds one catalogue sheet Drawing (1 unit = 1 mm on paper) from up to cols * rows (name, sections)."""
+    width, height = SHEET_SIZES[sheet_size]
+    cols, rows = grid
+    sheet = Drawing()
+    sheet.limits = (0.0, width, 0.0, height)
+
+    left, inset = BORDER
+    frame(sheet, left, inset, width - inset, height - inset)
+
+    # Sheet title block (bottom right)
+    block_w, block_h = SHEET_BLOCK
+    bx0, by0, bx1, by1 = width - inset - block_w, inset, width - inset, inset + block_h
+    frame(sheet, bx0, by0, bx1, by1)
+    sheet.add_line('outline', [bx1 - 40, bx1 - 40], [by0, by1])
+    sheet.add_text(bx0 + 3, (by0 + by1) / 2, title, ha='left', va='center', fontsize=11, fontweight='bold')
+    sheet.add_text(bx1 - 20, (by0 + by1) / 2, f'SHEET {number}', ha='center', va='center', fontsize=10)
+    sheet.add_text(left + 2, inset + 2, f'{sheet_size}   {time.strftime("%Y-%m-%d")}', ha='left', va='bottom', fontsize=7)
+
+    # Cells above the title block
+    cx0, cy0, cx1, cy1 = left, by1, width - inset, height - inset
+    cell_w, cell_h = (cx1 - cx0) / cols, (cy1 - cy0) / rows
+    scales = []
+    for k, (name, sections) in enumerate(parts):
+        col, row = k % cols, k // cols
+        cell = (cx0 + col * cell_w, cy1 - (row + 1) * cell_h, cx0 + (col + 1) * cell_w, cy1 - row * cell_h)
+        frame(sheet, *cell, style='thin')
+        scales.append(add_part(sheet, name, sections, cell))
+    return sheet, scales
+
+
+def sheet_paths(output):
+    """catalogue.svg -> catalogue-001.svg, catalogue-002.svg, ..."""
+    root, ext = os.path.splitext(output)
+    for number in itertools.count(1):
+        yield f'{root}-{number:03d}{ext}'
+
+
+def write_catalogue(specs, output, sheet_size='A3', grid=(2, 2), title='Shock parts catalogue'):
+    """Streams (name, sections) parts onto sheets in output (.pdf, or a .svg series); returns the sheet count."""
+    per_sheet = grid[0] * grid[1]
+    specs = iter(specs)
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    sheets = 0
+    if output.lower().endswith('.svg'):
+        from vector_writer import write_drawing
+
+        paths = sheet_paths(output)
+        while parts := list(itertools.islice(specs, per_sheet)):
+            sheets += 1
+            sheet, _ = build_sheet(parts, sheets, sheet_size, grid, title)
+            path = next(paths)
+            write_drawing(sheet, path)
+            print(f'Sheet {sheets}: {len(parts)} parts -> {path}')
+        return sheets
+
+    from matplotlib.backends.backend_pdf import PdfPages
+    from matplotlib.figure import Figure
+
+    width, height = SHEET_SIZES[sheet_size]
+    figure = Figure(figsize=(width / 25.4, height / 25.4))
+    with PdfPages(output, metadata={'Title': title}) as pdf:
+        while parts := list(itertools.islice(specs, per_sheet)):
+            sheets += 1
+            sheet, scales = build_sheet(parts, sheets, sheet_size, grid, title)
+            try:
+                sheet.draw(figure.add_axes((0, 0, 1, 1)))
+                pdf.savefig(figure)
+            finally:
+                figure.clear()  # release the sheet's artists before the next one
+            print(f'Sheet {sheets}: {len(parts)} parts, scales {", ".join(format_scale(s) for s in scales)}')
+    return sheets
+
+
+if __name__ == '__main__':
+    from batch_drawings import read_specs
+
+    parser = argparse.ArgumentParser(description='Pack part drawings onto catalogue sheets.')
+    parser.add_argument('specs', help='.jsonl/.csv part specs, .scad file or directory')
+    parser.add_argument('-o', '--output', default='catalogue.pdf', help='.pdf, or .svg for one file per sheet')
+    parser.add_argument('--sheet', choices=sorted(SHEET_SIZES), default='A3')
+    parser.add_argument('--grid', default='2x2', help='parts per sheet as COLSxROWS')
+    parser.add_argument('--title', default='Shock parts catalogue')
+    args = parser.parse_args()
+
+    cols, rows = (int(n) for n in args.grid.lower().split('x'))
+    t0 = time.perf_counter()
+    count = write_catalogue(read_specs(args.specs), args.output, args.sheet, (cols, rows), args.title)
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f'Wrote {count} sheets to {args.output} in {time.perf_counter() - t0:.1f} s (peak RSS {peak_mb:.0f} MB)')
@@ -0,0 +1,243 @@
+"""Collision-free placement of dimensions, callouts and labels.
+
+Annotations of a view are collected in a Layout in view-local coordinates
+(sheet orientation, origin at the view anchor). Every label and dimension
+line reserves a box; a placement tries tiers 0, 1, 2, ... (further from
+the part each time) and keeps the first whose boxes are free. Extension
+and leader lines are thin and may cross other annotations, as on a manual
+drawing, so they do not reserve space.
+
+Overlap queries go through a uniform grid (GridIndex): a box is tested
+only against the boxes registered in the cells it covers. Placements that
+all block each other (a column) resume above the last tier used instead
+of rescanning from tier 0, and arrange() jumps a view straight past the
+boxes it collides with, so laying out n labels costs about O(n) queries.
+
+Text boxes are estimated from DejaVu Sans advance widths and the sheet
+scale (drawing units per point), without asking matplotlib for a renderer.
+"""
+import math
+
+import numpy as np
+
+from drafting import plain_text
+
+DEFAULT_CELL = 10.0   # smallest grid cell size in drawing units (mm)
+CELL_POINTS = 50.0    # grid cell size in points, about one label, so large sheets keep few cells per box
+MAX_TIERS = 100000    # a placement that finds no free tier within this many raises ValueError
+LINE_CLEARANCE = 0.5  # half-width of the box reserved around a dimension line
+LINE_HEIGHT = 1.2     # text box height in em
+
+# Matplotlib's default subplot area (left=0.125, right=0.9, bottom=0.11, top=0.88)
+AXES_FRACTION = (0.775, 0.77)
+
+# DejaVu Sans advance widths in em
+CHAR_WIDTHS = {
+    **dict.fromkeys('0123456789', 0.636), '.': 0.318, ',': 0.318, ' ': 0.318, ':': 0.337,
+    '(': 0.390, ')': 0.390, '=': 0.838, '-': 0.361, '+': 0.838, 'Ø': 0.787, 'x': 0.592,
+    'M': 0.863, 'L': 0.557, 'I': 0.295, 'i': 0.278, 'l': 0.278, 'm': 0.974, 'w': 0.818, 'W': 0.989,
+}
+UPPER_WIDTH = 0.72
+LOWER_WIDTH = 0.60
+BOLD_FACTOR = 1.1
+
+
+def text_scale(width, height, figsize):
+    """Drawing units per point when a width x height sheet fills an equal-aspect axes of figsize inches."""
+    return max(width / (figsize[0] * 72 * AXES_FRACTION[0]), height / (figsize[1] * 72 * AXES_FRACTION[1]))
+
+
+def text_size(text, fontsize=10, scale=1.0, bold=False):
+    """(width, height) of a label in drawing units, unrotated."""
+    em = 0.0
+    for ch in plain_text(text):
+        em += CHAR_WIDTHS.get(ch, UPPER_WIDTH if ch.isupper() else LOWER_WIDTH)
+    size = fontsize * scale
+    return em * size * (BOLD_FACTOR if bold else 1.0), LINE_HEIGHT * size
+
+
+def text_box(x, y, text, scale, fontsize=10, ha='left', va='baseline', rotation=0, fontweight=None, **_):
+    """Box (x0, y0, x1, y1) a matplotlib text with these properties covers (rotation 0 or +-90)."""
+    w, h = text_size(text, fontsize, scale, fontweight == 'bold')
+    if rotation and round(rotation) % 180:
+        w, h = h, w
+    x0 = {'left': x, 'center': x - w / 2, 'right': x - w}[ha]
+    y0 = {'bottom': y, 'baseline': y - 0.2 * h, 'center': y - h / 2, 'top': y - h}[va]
+    return x0, y0, x0 + w, y0 + h
+
+
+def cell_size(scale):
+    """Grid cell size for a sheet with scale drawing units per point."""
+    return max(DEFAULT_CELL, CELL_POINTS * scale)
+
+
+def line_box(x0, y0, x1, y1):
+    """Box reserved by a horizontal or vertical dimension line."""
+    return (min(x0, x1) - LINE_CLEARANCE, min(y0, y1) - LINE_CLEARANCE,
+            max(x0, x1) + LINE_CLEARANCE, max(y0, y1) + LINE_CLEARANCE)
+
+
+def shift(box, dx, dy):
+    return box[0] + dx, box[1] + dy, box[2] + dx, box[3] + dy
+
+
+def overlaps(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+class GridIndex:
+    """Uniform-grid spatial index of axis-aligned boxes."""
+
+    def __init__(self, cell=DEFAULT_CELL):
+        self.cell = cell
+        self.cells = {}
+        self.boxes = []
+
+    def _cells(self, box):
+        c = self.cell
+        for i in range(math.floor(box[0] / c), math.floor(box[2] / c) + 1):
+            for j in range(math.floor(box[1] / c), math.floor(box[3] / c) + 1):
+                yield i, j
+
+    def insert(self, box):
+        self.boxes.append(box)
+        n = len(self.boxes) - 1
+        for key in self._cells(box):
+            self.cells.setdefault(key, []).append(n)
+
+    def query(self, box):
+        """Yields the boxes that overlap box (a box spanning several cells may come up more than once)."""
+        for key in self._cells(box):
+            for n in self.cells.get(key, ()):
+                if overlaps(box, self.boxes[n]):
+                    yield self.boxes[n]
+
+    def intersects(self, box):
+        return any(True for _ in self.query(box))
+
+
+class Layout:
+    """Annotations of one view in view-local coordinates, with the boxes they occupy."""
+
+    def __init__(self, scale, cell=None):
+        self.scale = scale
+        self.index = GridIndex(cell or cell_size(scale))
+        self.segments = {}  # style -> list of (N, 2, 2) arrays
+        self.circles = []   # (x, y, r, style)
+        self.texts = []     # (x, y, text, kwargs)
+        self.next_tier = {}  # column -> first tier not yet tried by that column
+
+    # --- Occupied space ---
+    def occupy(self, box):
+        self.index.insert(box)
+
+    def fits(self, boxes):
+        return not any(self.index.intersects(box) for box in boxes)
+
+    def text_box(self, x, y, text, **kwargs):
+        return text_box(x, y, text, self.scale, **kwargs)
+
+    def bounds(self):
+        boxes = np.array(self.index.boxes)
+        return boxes[:, 0].min(), boxes[:, 1].min(), boxes[:, 2].max(), boxes[:, 3].max()
+
+    def collides(self, index, dx, dy):
+        """True if any box of this layout, moved by (dx, dy), overlaps a box of index."""
+        return any(index.intersects(shift(box, dx, dy)) for box in self.index.boxes)
+
+    def conflicts(self, index, dx, dy):
+        """Yields (box, other) for every box of this layout, moved by (dx, dy), overlapping a box of index."""
+        for box in self.index.boxes:
+            moved = shift(box, dx, dy)
+            for other in index.query(moved):
+                yield moved, other
+
+    def copy_to(self, index, dx, dy):
+        for box in self.index.boxes:
+            index.insert(shift(box, dx, dy))
+
+    # --- Items ---
+    def add_segments(self, style, segs):
+        self.segments.setdefault(style, []).append(np.asarray(segs, dtype=float).reshape(-1, 2, 2))
+
+    def add_line(self, style, xs, ys):
+        self.add_segments(style, [[[xs[0], ys[0]], [xs[1], ys[1]]]])
+
+    def add_circle(self, x, y, r, style='outline'):
+        self.circles.append((x, y, r, style))
+        self.occupy((x - r, y - r, x + r, y + r))
+
+    def add_text(self, x, y, text, occupy=True, **kwargs):
+        self.texts.append((x, y, text, kwargs))
+        if occupy:
+            self.occupy(self.text_box(x, y, text, **kwargs))
+
+    def place(self, candidate, column=None, max_tiers=MAX_TIERS):
+        """Keeps the first tier whose boxes are free; returns it.
+
+        candidate(tier) returns (boxes, add) - add() adds the items of that
+        placement - or None when the tier is not allowed. Placements of one
+        column all block each other (e.g. diameter dimensions, which all
+        cross the axis), so the search starts above the column's last tier.
+        Raises ValueError if no tier below max_tiers is free.
+        """
+        start = self.next_tier.get(column, 0) if column is not None else 0
+        for tier in range(start, max_tiers):
+            option = candidate(tier)
+            if option is not None and self.fits(option[0]):
+                break
+        else:
+            raise ValueError(f'No free placement within {max_tiers} tiers')
+        boxes, add = option
+        for box in boxes:
+            self.occupy(box)
+        add()
+        if column is not None:
+            self.next_tier[column] = tier + 1
+        return tier
+
+    def emit(self, drawing, dx, dy):
+        """Adds the items to a Drawing with the view anchor at (dx, dy)."""
+        offset = np.array([dx, dy])
+        for style, parts in self.segments.items():
+            for segs in parts:
+                drawing.add_segments(style, segs + offset)
+        for x, y, r, style in self.circles:
+            drawing.add_circle(x + dx, y + dy, r, style)
+        for x, y, text, kwargs in self.texts:
+            drawing.add_text(x + dx, y + dy, text, **kwargs)
+
+
+def _clearance(box, other, dx, dy):
+    """How far box must move along (dx, dy) to stop overlapping other."""
+    moves = []
+    if dx:
+        moves.append((other[2] - box[0]) / dx if dx > 0 else (other[0] - box[2]) / dx)
+    if dy:
+        moves.append((other[3] - box[1]) / dy if dy > 0 else (other[1] - box[3]) / dy)
+    return min(moves)  # apart along either axis is enough
+
+
+def arrange(layout, index, x, y, dx=0.0, dy=0.0, step=1.0, max_steps=None):
+    """Moves a view anchor from (x, y) by (dx, dy) * step until its layout clears index; returns (x, y).
+
+    Every colliding pair of boxes gives a distance the view has to move at
+    least, so the view jumps by the largest of them (in whole steps) and is
+    checked again; the result is the first whole step that clears.
+    Raises ValueError after max_steps steps (if given).
+    """
+    steps = 0
+    while True:
+        conflicts = list(layout.conflicts(index, x, y))
+        if not conflicts:
+            break
+        if not (dx or dy):
+            raise ValueError('View collides and has no direction to move in')
+        need = max(_clearance(box, other, dx, dy) for box, other in conflicts)
+        jump = max(math.ceil(need / step - 1e-9), 1)
+        steps += jump
+        if max_steps is not None and steps > max_steps:
+            raise ValueError(f'View does not clear within {max_steps} steps')
+        x, y = x + dx * step * jump, y + dy * step * jump
+    layout.copy_to(index, x, y)
+    return x, y
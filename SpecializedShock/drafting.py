@@ -0,0 +1,170 @@
+"""Batched line rendering for the drawing scripts.
+
+A Drawing collects the geometry of a sheet by line style instead of
+creating one matplotlib artist per segment. Segments are kept as NumPy
+arrays of shape (N, 2, 2) - N segments of two (x, y) points - and
+Drawing.draw() emits one LineCollection per style, one PatchCollection
+per circle style and the text labels.
+
+Matplotlib is only imported inside draw(), so a Drawing can be built
+(and written by vector_writer.py) without it.
+"""
+import numpy as np
+
+import profiling
+
+# Line styles used on the drawings (all black)
+STYLES = {
+    'outline':    {'linestyle': '-',  'linewidth': 1.5, 'alpha': 1.0},  # visible edges
+    'hidden':     {'linestyle': '--', 'linewidth': 1.0, 'alpha': 1.0},  # hidden edges
+    'centerline': {'linestyle': '-.', 'linewidth': 0.8, 'alpha': 1.0},
+    'dimension':  {'linestyle': '-',  'linewidth': 0.8, 'alpha': 1.0},  # dimension lines
+    'thin':       {'linestyle': '-',  'linewidth': 0.5, 'alpha': 1.0},  # extension lines, thread termination
+    'thread':     {'linestyle': '-',  'linewidth': 0.5, 'alpha': 0.7},  # thread slash lines
+    'projection': {'linestyle': ':',  'linewidth': 0.5, 'alpha': 1.0},  # projection aids between views
+}
+
+# Levels of detail: line styles drawn (None: all), whether text is drawn, default DPI (None: matplotlib's)
+DETAIL_LEVELS = {
+    'draft': {'styles': ('outline', 'centerline'), 'text': False, 'dpi': 50},
+    'final': {'styles': None, 'text': True, 'dpi': None},
+}
+
+
+# Mathtext markup used in the labels and its plain-text replacement
+MATHTEXT_REPLACEMENTS = [(r'\emptyset ', 'Ø'), (r'\emptyset', 'Ø'), (r'\mathrm', ''), ('$', ''), ('{', ''), ('}', '')]
+
+
+def plain_text(text):
+    """Strips the mathtext markup from a label ('$\\emptyset 8.40$' -> 'Ø8.40')."""
+    for markup, plain in MATHTEXT_REPLACEMENTS:
+        text = text.replace(markup, plain)
+    return text
+
+
+def segments(x0, y0, x1, y1):
+    """Stacks endpoint coordinates (scalars or arrays) into an (N, 2, 2) segment array."""
+    x0, y0, x1, y1 = np.broadcast_arrays(*(np.atleast_1d(np.asarray(v, dtype=float)) for v in (x0, y0, x1, y1)))
+    return np.stack([np.stack([x0, y0], axis=-1), np.stack([x1, y1], axis=-1)], axis=1)
+
+
+class Drawing:
+    """Display list of one drawing sheet, grouped by line style."""
+
+    def __init__(self, title=None):
+        self.title = title
+        self.limits = None  # (x_min, x_max, y_min, y_max)
+        self._segments = {}
+        self.circles = []   # (x, y, r, style)
+        self.texts = []     # (x, y, text, kwargs)
+
+    def add_segments(self, style, segs):
+        """Adds an (N, 2, 2) array of segments in the given style."""
+        if style not in STYLES:
+            raise ValueError(f'Unknown line style: {style}')
+        segs = np.asarray(segs, dtype=float).reshape(-1, 2, 2)
+        if len(segs):
+            self._segments.setdefault(style, []).append(segs)
+
+    def add_line(self, style, xs, ys):
+        """Adds one segment given ax.plot-style [x0, x1], [y0, y1] lists."""
+        self.add_segments(style, segments(xs[0], ys[0], xs[1], ys[1]))
+
+    def add_circle(self, x, y, r, style='outline'):
+        self.circles.append((x, y, r, style))
+
+    def add_text(self, x, y, text, **kwargs):
+        self.texts.append((x, y, text, kwargs))
+
+    def add_drawing(self, other, scale=1.0, offset=(0.0, 0.0)):
+        """Copies another Drawing into this one, scaled about the origin and then moved by offset.
+
+        Text keeps its point size, so a drawing placed at a reduced scale should
+        have been laid out for that scale.
+        """
+        dx, dy = offset
+        for style in other.styles():
+            self.add_segments(style, other.segments(style) * scale + np.array([dx, dy]))
+        for x, y, r, style in other.circles:
+            self.add_circle(x * scale + dx, y * scale + dy, r * scale, style)
+        for x, y, text, kwargs in other.texts:
+            self.add_text(x * scale + dx, y * scale + dy, text, **kwargs)
+
+    def at_detail(self, level):
+        """This drawing at a DETAIL_LEVELS level; the draft shares this drawing's segment arrays.
+
+        A draft keeps the outline and centerlines, the outline circles and a
+        plain-text title (no mathtext), so it always matches the final drawing.
+        """
+        detail = DETAIL_LEVELS[level]
+        if detail['styles'] is None and detail['text']:
+            return self
+        drawing = Drawing(plain_text(self.title) if self.title else None)
+        drawing.limits = self.limits
+        for style in self.styles():
+            if detail['styles'] is None or style in detail['styles']:
+                drawing._segments[style] = [self.segments(style)]
+        drawing.circles = [c for c in self.circles if detail['styles'] is None or c[3] in detail['styles']]
+        if detail['text']:
+            drawing.texts = list(self.texts)
+        return drawing
+
+    def segments(self, style):
+        """Returns every segment of one style as a single (N, 2, 2) array."""
+        parts = self._segments.get(style)
+        if not parts:
+            return np.empty((0, 2, 2))
+        if len(parts) > 1:
+            self._segments[style] = parts = [np.concatenate(parts)]
+        return parts[0]
+
+    def styles(self):
+        return [style for style in STYLES if style in self._segments]
+
+    def segment_count(self):
+        return sum(len(self.segments(style)) for style in self.styles())
+
+    def draw(self, ax):
+        """Draws the sheet on a matplotlib Axes and returns the artists created."""
+        with profiling.phase('artists'):
+            artists = self._draw(ax)
+        profiling.count('artists', len(artists))
+        profiling.count('segments', self.segment_count() if profiling.enabled() else 0)
+        profiling.count('labels', len(self.texts))
+        return artists
+
+    def _draw(self, ax):
+        from matplotlib.collections import LineCollection, PatchCollection
+        from matplotlib.patches import Circle
+
+        profiling.instrument_matplotlib()
+        artists = []
+        circle_styles = {}
+        for x, y, r, style in self.circles:
+            circle_styles.setdefault(style, []).append(Circle((x, y), r))
+        for style, patches in circle_styles.items():
+            props = STYLES[style]
+            artists.append(ax.add_collection(PatchCollection(
+                patches, facecolor='none', edgecolor='black', alpha=props['alpha'],
+                linewidths=props['linewidth'], linestyles=props['linestyle'], zorder=1)))
+
+        for style in self.styles():
+            props = STYLES[style]
+            solid = props['linestyle'] == '-'
+            artists.append(ax.add_collection(LineCollection(
+                self.segments(style), colors='black', alpha=props['alpha'],
+                linewidths=props['linewidth'], linestyles=props['linestyle'],
+                capstyle='projecting' if solid else 'butt', joinstyle='round', zorder=2)))
+
+        for x, y, text, kwargs in self.texts:
+            artists.append(ax.text(x, y, text, **kwargs))
+
+        ax.set_aspect('equal', adjustable='box')
+        if self.title:
+            ax.set_title(self.title)
+        if self.limits:
+            x_min, x_max, y_min, y_max = self.limits
+            ax.set_xlim(x_min, x_max)
+            ax.set_ylim(y_min, y_max)
+        ax.axis('off')
+        return artists
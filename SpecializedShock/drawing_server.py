@@ -0,0 +1,276 @@
+"""Long-running drawing service for one-drawing-at-a-time callers.
+
+Starting Python, importing matplotlib and setting up fonts and mathtext
+(the Ø labels) costs far more than drawing one part. The server pays it
+once: every worker process imports the drawing code, creates its Figure
+on an Agg canvas and renders a warm-up drawing at start-up, then serves
+requests from a multiprocessing pool. HTTP requests are accepted on
+threads, so concurrent callers are rendered in parallel.
+
+API (localhost HTTP, or HTTP over a Unix socket with --unix):
+    POST /drawing?format=png&dpi=100&detail=final
+        body: {"sections": [[length, d_major, d_minor, start_z, threaded, label], ...]}
+              (or the bare list of rows)
+        returns the PNG/SVG/DXF/PDF bytes; X-Render-Ms is the server-side latency,
+        X-Cache is hit or miss (render cache, see render_cache.py, kept within its size and
+        age limits by periodic evict() calls); detail=draft returns the
+        outline-only preview (drafting.DETAIL_LEVELS, default dpi 50) in a fraction of the time
+    GET /stats
+        request count and latency percentiles as JSON
+
+Usage:
+    python drawing_server.py --port 8765 --workers 4
+    curl -s -X POST --data @part.json 'localhost:8765/drawing?format=svg' -o part.svg
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import queue
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import batch_drawings
+import vector_writer
+from batch_drawings import SOURCES, normalize_sections, worker_figure
+from drafting import DETAIL_LEVELS
+from render_cache import RenderCache, cache_key, default_cache, source_digest
+from stepped_cylinder_three_view_gemini import build_stepped_drawing, render_style, sections_data
+
+CONTENT_TYPES = {
+    'png': 'image/png',
+    'pdf': 'application/pdf',
+    'svg': 'image/svg+xml',
+    'dxf': 'application/dxf',
+}
+DEFAULT_PORT = 8765
+DEFAULT_DPI = 100
+MAX_DPI = 600
+MAX_BODY = 4 * 1024 * 1024
+LATENCY_WINDOW = 1000  # requests kept for the /stats percentiles
+EVICT_EVERY = 100      # run the render cache's size/age eviction after this many new entries...
+EVICT_INTERVAL = 600   # ...or when this many seconds have passed since the last run
+READY_TIMEOUT = 120    # seconds for every worker to finish its warm-up drawing
+
+
+# --- Worker processes ---
+def init_worker(ready=None):
+    """Preloads matplotlib, fonts and mathtext by rendering one drawing, then reports its pid on ready."""
+    worker_figure()
+    render_bytes(sections_data, 'png', DEFAULT_DPI)
+    if ready is not None:
+        ready.put(os.getpid())
+
+
+def render_bytes(sections, fmt, dpi, detail='final'):
+    """Renders one part and returns the file contents."""
+    drawing = build_stepped_drawing(sections, detail=detail)
+    if fmt in batch_drawings.VECTOR_FORMATS:
+        text = io.StringIO()
+        vector_writer.WRITERS['.' + fmt](drawing, text)
+        return text.getvalue().encode('utf-8')
+    figure = worker_figure()
+    buffer = io.BytesIO()
+    try:
+        drawing.draw(figure.add_subplot())
+        figure.savefig(buffer, format=fmt, bbox_inches='tight', dpi=dpi)
+    finally:
+        figure.clear()
+    return buffer.getvalue()
+
+
+def render_job(job):
+    """Pool entry point: returns (bytes, seconds) or raises."""
+    t0 = time.perf_counter()
+    data = render_bytes(*job)
+    return data, time.perf_counter() - t0
+
+
+# --- Server ---
+class DrawingService:
+    """Worker pool, render cache and latency bookkeeping shared by the request threads."""
+
+    def __init__(self, workers=None, cache=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.ready = multiprocessing.Queue()
+        self.pool = multiprocessing.Pool(self.workers, initializer=init_worker, initargs=(self.ready,))
+        self.cache = cache
+        self.style = dict(render_style(), source=source_digest(SOURCES)) if cache else None
+        self.latencies = []
+        self.counts = {'requests': 0, 'errors': 0, 'hits': 0}
+        self.lock = threading.Lock()
+        self.puts = 0
+        self.evicted_at = time.monotonic()
+        self.evicting = threading.Lock()
+
+    def wait_ready(self, timeout=READY_TIMEOUT):
+        """Blocks until every worker has finished its warm-up drawing.
+
+        Raises queue.Empty after timeout seconds in total: a worker whose
+        warm-up fails is replaced by the pool and fails again, so it never reports.
+        """
+        deadline = time.monotonic() + timeout
+        pids = set()
+        while len(pids) < self.workers:
+            pids.add(self.ready.get(timeout=max(deadline - time.monotonic(), 0)))
+
+    def render(self, sections, fmt, dpi, detail='final'):
+        """Returns (bytes, cache hit)."""
+        key = cache_key(sections, dict(self.style, detail=DETAIL_LEVELS[detail]), dpi, fmt) if self.cache else None
+        hit = self.cache.get(key, fmt) if key else None
+        if hit:
+            with open(hit, 'rb') as f:
+                return f.read(), True
+        data, _ = self.pool.apply(render_job, ((sections, fmt, dpi, detail),))
+        if key:
+            self.cache.put_bytes(key, fmt, data)
+            self.maybe_evict()
+        return data, False
+
+    def maybe_evict(self):
+        """Keeps the cache within its size/age limits, every EVICT_EVERY puts or EVICT_INTERVAL seconds."""
+        with self.lock:
+            self.puts += 1
+            due = self.puts >= EVICT_EVERY or time.monotonic() - self.evicted_at >= EVICT_INTERVAL
+            if due:
+                self.puts = 0
+                self.evicted_at = time.monotonic()
+        if due and self.evicting.acquire(blocking=False):  # one scan at a time
+            try:
+                self.cache.evict()
+            finally:
+                self.evicting.release()
+
+    def record(self, seconds, error=False, hit=False):
+        with self.lock:
+            self.counts['requests'] += 1
+            self.counts['errors'] += error
+            self.counts['hits'] += hit
+            self.latencies.append(seconds)
+            del self.latencies[:-LATENCY_WINDOW]
+
+    def stats(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            counts = dict(self.counts)
+        if latencies:
+            for name, q in (('p50_ms', 0.5), ('p95_ms', 0.95), ('max_ms', 1.0)):
+                counts[name] = round(1000 * latencies[min(len(latencies) - 1, int(q * len(latencies)))], 2)
+        return counts
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+
+class DrawingHandler(BaseHTTPRequestHandler):
+    service = None  # set by serve()
+
+    def do_GET(self):
+        if urlparse(self.path).path != '/stats':
+            return self.send_error(404)
+        self.reply(200, json.dumps(self.service.stats()).encode(), 'application/json')
+
+    def do_POST(self):
+        t0 = time.perf_counter()
+        url = urlparse(self.path)
+        if url.path != '/drawing':
+            return self.send_error(404)
+        query = parse_qs(url.query)
+        fmt = query.get('format', ['png'])[0].lower()
+        detail = query.get('detail', ['final'])[0].lower()
+        try:
+            dpi = int(query.get('dpi', [DETAIL_LEVELS.get(detail, {}).get('dpi') or DEFAULT_DPI])[0])
+            length = int(self.headers.get('Content-Length', 0))
+            if fmt not in CONTENT_TYPES or detail not in DETAIL_LEVELS or not 0 < dpi <= MAX_DPI \
+                    or not 0 < length <= MAX_BODY:
+                raise ValueError(f'format must be one of {sorted(CONTENT_TYPES)}, detail one of '
+                                 f'{sorted(DETAIL_LEVELS)}, dpi 1-{MAX_DPI}, body up to {MAX_BODY} bytes')
+            spec = json.loads(self.rfile.read(length))
+            sections = normalize_sections(spec['sections'] if isinstance(spec, dict) else spec)
+            if not sections:
+                raise ValueError('no sections')
+        except (ValueError, KeyError, TypeError) as exc:
+            self.service.record(time.perf_counter() - t0, error=True)
+            return self.reply(400, f'Bad request: {exc}\n'.encode(), 'text/plain', t0)
+        try:
+            data, hit = self.service.render(sections, fmt, dpi, detail)
+        except Exception as exc:
+            self.service.record(time.perf_counter() - t0, error=True)
+            return self.reply(500, f'{type(exc).__name__}: {exc}\n'.encode(), 'text/plain', t0)
+        self.service.record(time.perf_counter() - t0, hit=hit)
+        self.reply(200, data, CONTENT_TYPES[fmt], t0, hit)
+
+    def reply(self, status, body, content_type, t0=None, hit=None):
+        self.latency_ms = 1000 * (time.perf_counter() - t0) if t0 is not None else None
+        self.send_response(status)  # logs the request, with latency_ms
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if t0 is not None:
+            self.send_header('X-Render-Ms', f'{self.latency_ms:.1f}')
+        if hit is not None:
+            self.send_header('X-Cache', 'hit' if hit else 'miss')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_request(self, code='-', size='-'):
+        latency = getattr(self, 'latency_ms', None)
+        self.log_message('"%s" %s %s', self.requestline, str(code), f'{latency:.1f} ms' if latency else '')
+
+    def address_string(self):
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(host='127.0.0.1', port=DEFAULT_PORT, unix_socket=None, workers=None, cache=None,
+          ready_timeout=READY_TIMEOUT):
+    """Runs the drawing server until interrupted; exits with an error if the workers fail to start."""
+    t0 = time.perf_counter()
+    service = DrawingService(workers, cache)
+    DrawingHandler.service = service
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        server = UnixHTTPServer(unix_socket, DrawingHandler)
+        where = unix_socket
+    else:
+        server = ThreadingHTTPServer((host, port), DrawingHandler)
+        where = f'http://{host}:{server.server_address[1]}'
+    try:
+        # Wait for every worker to finish its warm-up before taking requests
+        try:
+            service.wait_ready(ready_timeout)
+        except queue.Empty:
+            raise SystemExit(f'Workers not ready after {ready_timeout:g} s (warm-up drawing failing?)')
+        print(f'Serving drawings on {where} (ready in {time.perf_counter() - t0:.1f} s)')
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if unix_socket and os.path.exists(unix_socket):
+            os.remove(unix_socket)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve stepped-cylinder drawings over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', help='listen on this Unix socket instead of TCP')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--cache-dir', default=None,
+                        help='render cache directory (default: SHOCK_RENDER_CACHE; empty string disables)')
+    parser.add_argument('--ready-timeout', type=float, default=READY_TIMEOUT,
+                        help='seconds to wait for the workers to warm up (default: %(default)s)')
+    args = parser.parse_args()
+
+    cache = default_cache() if args.cache_dir is None else (RenderCache(args.cache_dir) if args.cache_dir else None)
+    serve(args.host, args.port, args.unix, args.workers, cache, args.ready_timeout)
@@ -0,0 +1,121 @@
+"""Analytic hatching of sections: hatch lines as segment arrays.
+
+Instead of matplotlib hatch patterns (rasterized per patch, and written
+as pattern tiles into vector output), hatching is computed as geometry:
+a family of parallel lines is clipped against a polygon or circle and
+returned as an (N, 2, 2) segment array that is drawn as one
+LineCollection (or added to a drafting.Drawing).
+
+Polygons are clipped with the even-odd rule, so holes (bores) are given
+as extra rings. All edges are intersected with all lines in one array
+operation; each line's crossings are sorted and paired.
+
+Conventions (ISO 128-50): thin continuous lines at 45 degrees, spacing
+chosen in proportion to the size of the hatched area, never below
+MIN_SPACING. Pass angle=135 to set an adjacent part apart.
+
+section_hatch() hatches the cut face of a shaft in part coordinates (the
+FRONT / RIGHT VIEW of stepped_cylinder_three_view.py is a half section).
+"""
+import numpy as np
+
+from stepped_geometry import half_profile
+
+DEFAULT_ANGLE = 45.0   # degrees from the x axis
+MIN_SPACING = 0.7      # mm
+MAX_SPACING = 5.0      # mm
+SPACING_FRACTION = 0.12  # spacing / size of the hatched area
+
+
+def hatch_spacing(size):
+    """Hatch line spacing for an area of the given characteristic size (e.g. diameter), in mm."""
+    return float(np.clip(size * SPACING_FRACTION, MIN_SPACING, MAX_SPACING))
+
+
+def _rotation(angle):
+    a = np.radians(angle)
+    c, s = np.cos(a), np.sin(a)
+    return np.array([[c, -s], [s, c]])
+
+
+def hatch_polygon(rings, spacing, angle=DEFAULT_ANGLE, phase=0.0):
+    """Clips parallel lines against polygon rings (even-odd rule); returns (N, 2, 2) segments.
+
+    rings is a (K, 2) vertex array or a list of them (outer boundary plus
+    holes); rings are closed implicitly. Lines run at angle degrees,
+    spacing apart, offset by phase * spacing.
+    """
+    if isinstance(rings, np.ndarray) and rings.ndim == 2:
+        rings = [rings]
+    rot = _rotation(angle)
+    # Rotate so that the hatch lines are horizontal (y = const)
+    edges = np.concatenate([np.stack([ring, np.roll(ring, -1, axis=0)], axis=1)
+                            for ring in (np.asarray(r, dtype=float) @ rot for r in rings)])
+    y0, y1 = edges[:, 0, 1], edges[:, 1, 1]
+    x0, x1 = edges[:, 0, 0], edges[:, 1, 0]
+
+    first = np.ceil((min(y0.min(), y1.min()) / spacing) - phase)
+    last = np.floor((max(y0.max(), y1.max()) / spacing) - phase)
+    lines = (np.arange(first, last + 1) + phase) * spacing
+    if not len(lines):
+        return np.empty((0, 2, 2))
+
+    # Crossings of every line with every edge; half-open in y so shared vertices count once
+    y = lines[:, None]
+    lo, hi = np.minimum(y0, y1), np.maximum(y0, y1)
+    crosses = (y >= lo) & (y < hi)
+    line_idx, edge_idx = np.nonzero(crosses)
+    t = (lines[line_idx] - y0[edge_idx]) / (y1[edge_idx] - y0[edge_idx])
+    x = x0[edge_idx] + t * (x1[edge_idx] - x0[edge_idx])
+
+    # Sort crossings along each line; every line has an even count, so consecutive pairs are inside spans
+    order = np.lexsort((x, line_idx))
+    x, line_idx = x[order], line_idx[order]
+    xa, xb = x[0::2], x[1::2]
+    yl = lines[line_idx[0::2]]
+    keep = xb > xa
+    segs = np.stack([np.stack([xa, yl], axis=-1), np.stack([xb, yl], axis=-1)], axis=1)[keep]
+    return segs @ rot.T
+
+
+def hatch_circle(center, r, spacing, angle=DEFAULT_ANGLE, r_inner=0.0, phase=0.0):
+    """Hatch chords of a circle (or a ring with r_inner > 0); returns (N, 2, 2) segments."""
+    n = np.ceil(r / spacing + abs(phase))
+    d = (np.arange(-n, n + 1) + phase) * spacing  # signed distance of each line from the center
+    d = d[np.abs(d) < r]
+    half = np.sqrt(r ** 2 - d ** 2)
+    if r_inner > 0:
+        inner = np.sqrt(np.clip(r_inner ** 2 - d ** 2, 0.0, None))
+        cut = np.abs(d) < r_inner
+        # Lines through the hole give two chords: outer..inner on either side
+        starts = np.concatenate([-half, inner[cut]])
+        ends = np.concatenate([np.where(cut, -inner, half), half[cut]])
+        d = np.concatenate([d, d[cut]])
+    else:
+        starts, ends = -half, half
+    # Local frame: x along the lines, y across them
+    segs = np.stack([np.stack([starts, d], axis=-1), np.stack([ends, d], axis=-1)], axis=1)
+    return segs @ _rotation(angle).T + np.asarray(center, dtype=float)
+
+
+def profile_polygon(table):
+    """Closed outline of the full longitudinal section of a SectionTable as (K, 2) (z, r) vertices."""
+    z = np.column_stack([table.start_z, table.end_z]).ravel()
+    r = np.repeat(table.r_major, 2)
+    return np.concatenate([np.column_stack([z, r]), np.column_stack([z[::-1], -r[::-1]])])
+
+
+def section_hatch(table, spacing=None, angle=DEFAULT_ANGLE, bores=None, half=False):
+    """Hatching of the cut view of a shaft in (z, r) part coordinates; project it with a view transform.
+
+    bores is an optional SectionTable of axial holes, left unhatched.
+    half hatches only the upper half (r >= 0), for a half section.
+    """
+    spacing = hatch_spacing(table.max_diameter) if spacing is None else spacing
+    rings = [half_profile(table) if half else profile_polygon(table)]
+    if bores is not None:
+        # One rectangle per bore row; bores need not be contiguous
+        for z0, z1, r in zip(bores.start_z, bores.end_z, bores.r_major):
+            r0 = 0.0 if half else -r
+            rings.append(np.array([[z0, r0], [z1, r0], [z1, r], [z0, r]]))
+    return hatch_polygon(rings, spacing, angle)
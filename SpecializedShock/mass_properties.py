@@ -0,0 +1,257 @@
+"""Mass properties and tolerance stack-ups of stepped shafts.
+
+Every section of a sections_data table is a solid cylinder on the z axis,
+so the properties are closed-form sums over the sections:
+
+    volume       sum(pi r^2 L)
+    mass         density * volume
+    cg_z         sum(m_i z_i) / mass, z_i = section midpoint
+    i_axial      sum(m_i r_i^2 / 2)                           (about the z axis)
+    i_transverse sum(m_i (3 r_i^2 + L_i^2) / 12 + m_i (z_i - cg_z)^2)  (about x through the CG)
+
+Threaded sections use an effective radius from their major and minor
+diameters (THREAD_MODELS). A 60 degree V thread fills about half the ring
+between the two, so the default 'equal_area' radius is
+sqrt((r_major^2 + r_minor^2) / 2). Bores (e.g. from scad_sections.extract)
+are subtracted as negative cylinders.
+
+The same kernel works on arrays of any leading shape, so a product family
+is evaluated by padding the tables to one (parts, sections) array, and a
+Monte Carlo stack-up by sampling (samples, sections) arrays of lengths and
+diameters in one pass. Lengths are chain-dimensioned: each section moves
+with the sampled ends of the sections before it (gaps between sections
+keep their nominal size), so the overall length stacks up.
+Tolerances default to ISO 2768-m for the nominal size.
+
+Units: mm, g, g*mm^2.
+
+Usage:
+    python mass_properties.py                       # sections_data of the three-view drawing
+    python mass_properties.py parts.jsonl --samples 1000000 --density 7.85
+"""
+import argparse
+import json
+import math
+
+import numpy as np
+
+STEEL_DENSITY = 7.85e-3   # g/mm^3
+DEFAULT_SAMPLES = 1_000_000
+SIGMA_LEVEL = 3.0         # tolerance limit = 3 sigma for normal sampling
+CHUNK_ELEMENTS = 8_000_000  # samples x sections per batch (bounds memory for long tables)
+PERCENTILES = (0.135, 50.0, 99.865)  # +-3 sigma equivalents
+
+# ISO 2768-m permissible deviations for linear dimensions: (upper nominal size, +-deviation)
+ISO_2768_M = [(3, 0.1), (6, 0.1), (30, 0.2), (120, 0.3), (400, 0.5), (1000, 0.8), (2000, 1.2), (4000, 2.0)]
+
+
+def _r2_equal_area(d_major, d_minor):
+    return (d_major ** 2 + d_minor ** 2) / 8
+
+
+THREAD_MODELS = {
+    'equal_area': _r2_equal_area,
+    'minor': lambda d_major, d_minor: d_minor ** 2 / 4,
+    'major': lambda d_major, d_minor: d_major ** 2 / 4,
+}
+
+QUANTITIES = ['total_length', 'volume', 'mass', 'cg_z', 'i_axial', 'i_transverse']
+
+
+def iso_2768_m(nominal):
+    """ISO 2768-m +- deviation for nominal sizes (array)."""
+    limits = np.array([size for size, _ in ISO_2768_M])
+    deviations = np.array([dev for _, dev in ISO_2768_M])
+    return deviations[np.minimum(np.searchsorted(limits, np.abs(nominal)), len(limits) - 1)]
+
+
+# --- Kernel ---
+def solid_properties(length, r2, start_z, density=STEEL_DENSITY, sign=1.0):
+    """Properties of coaxial cylinders; the last axis runs over the cylinders.
+
+    length, r2 (radius squared), start_z and sign broadcast together; every
+    leading axis (parts, samples) is kept.
+    """
+    m = sign * density * math.pi * r2 * length
+    mass = m.sum(axis=-1)
+    z = start_z + length / 2
+    cg_z = (m * z).sum(axis=-1) / mass
+    i_axial = (m * r2 / 2).sum(axis=-1)
+    i_transverse = (m * (3 * r2 + length ** 2) / 12 + m * (z - cg_z[..., None]) ** 2).sum(axis=-1)
+    return {'volume': mass / density, 'mass': mass, 'cg_z': cg_z, 'i_axial': i_axial, 'i_transverse': i_transverse}
+
+
+def section_arrays(sections_data, thread_model='equal_area'):
+    """(length, r2, start_z) arrays of a table, threads at their effective radius."""
+    from stepped_geometry import SectionTable
+
+    table = SectionTable(sections_data)
+    r2 = np.where(table.threaded, THREAD_MODELS[thread_model](table.d_major, table.d_minor), table.r_major ** 2)
+    return table, r2
+
+
+def _with_bores(length, r2, start_z, bores, thread_model):
+    """Appends bores (negative cylinders) along the last axis; returns arrays and the sign vector."""
+    sign = np.ones(length.shape[-1])
+    if not bores:
+        return length, r2, start_z, sign
+    bore_table, bore_r2 = section_arrays(bores, thread_model)
+    shape = length.shape[:-1]
+    length = np.concatenate([length, np.broadcast_to(bore_table.length, shape + bore_table.length.shape)], axis=-1)
+    r2 = np.concatenate([r2, np.broadcast_to(bore_r2, shape + bore_r2.shape)], axis=-1)
+    start_z = np.concatenate([start_z, np.broadcast_to(bore_table.start_z, shape + bore_table.start_z.shape)],
+                             axis=-1)
+    return length, r2, start_z, np.concatenate([sign, -np.ones(len(bore_table))])
+
+
+def mass_properties(sections_data, density=STEEL_DENSITY, bores=None, thread_model='equal_area'):
+    """Nominal properties of one part (floats)."""
+    table, r2 = section_arrays(sections_data, thread_model)
+    length, r2, start_z, sign = _with_bores(table.length, r2, table.start_z, bores, thread_model)
+    props = {k: float(v) for k, v in solid_properties(length, r2, start_z, density, sign).items()}
+    props['total_length'] = table.total_length
+    return props
+
+
+def family_properties(tables, density=STEEL_DENSITY, thread_model='equal_area'):
+    """Nominal properties of many parts in one array pass; returns {quantity: (parts,) array}.
+
+    Tables are padded with zero-length sections, which add nothing.
+    """
+    width = max(len(t) for t in tables)
+    length = np.zeros((len(tables), width))
+    r2 = np.zeros_like(length)
+    start_z = np.zeros_like(length)
+    for i, rows in enumerate(tables):
+        table, table_r2 = section_arrays(rows, thread_model)
+        n = len(table)
+        length[i, :n], r2[i, :n], start_z[i, :n] = table.length, table_r2, table.start_z
+    props = solid_properties(length, r2, start_z, density)
+    props['total_length'] = (start_z + length).max(axis=-1)
+    return props
+
+
+# --- Monte Carlo ---
+def _deviations(rng, shape, tol, distribution):
+    if distribution == 'uniform':
+        return rng.uniform(-1.0, 1.0, shape) * tol
+    return rng.standard_normal(shape) * (tol / SIGMA_LEVEL)
+
+
+def sample_properties(sections_data, samples, length_tol=None, diameter_tol=None, density=STEEL_DENSITY,
+                      bores=None, thread_model='equal_area', distribution='normal', rng=None):
+    """Monte Carlo samples of every quantity; returns {quantity: (samples,) array}.
+
+    length_tol / diameter_tol are +- limits, scalars or one per section
+    (default ISO 2768-m). Diameter deviations move a thread's major and
+    minor diameters together.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    table, _ = section_arrays(sections_data, thread_model)
+    n = len(table)
+    length_tol = iso_2768_m(table.length) if length_tol is None else np.broadcast_to(length_tol, (n,))
+    diameter_tol = iso_2768_m(table.d_major) if diameter_tol is None else np.broadcast_to(diameter_tol, (n,))
+    r2_of = THREAD_MODELS[thread_model]
+
+    out = {q: np.empty(samples) for q in QUANTITIES}
+    block = max(1, CHUNK_ELEMENTS // n)
+    for lo in range(0, samples, block):
+        hi = min(samples, lo + block)
+        shape = (hi - lo, n)
+        deviation = _deviations(rng, shape, length_tol, distribution)
+        length = table.length + deviation
+        delta = _deviations(rng, shape, diameter_tol, distribution)
+        d_major = table.d_major + delta
+        r2 = np.where(table.threaded, r2_of(d_major, table.d_minor + delta), d_major ** 2 / 4)
+        # Each section is pushed along by the deviations of the ones before it
+        start_z = table.start_z + np.cumsum(deviation, axis=-1) - deviation
+        out['total_length'][lo:hi] = (start_z + length).max(axis=-1)
+        length, r2, start_z, sign = _with_bores(length, r2, start_z, bores, thread_model)
+        for name, values in solid_properties(length, r2, start_z, density, sign).items():
+            out[name][lo:hi] = values
+    return out
+
+
+def summarize(values, limits=None):
+    """mean/std/percentiles (and yield inside limits) of a sample array."""
+    low, median, high = np.percentile(values, PERCENTILES)
+    summary = {'mean': float(values.mean()), 'std': float(values.std()), 'min': float(values.min()),
+               'p0.135': float(low), 'median': float(median), 'p99.865': float(high), 'max': float(values.max())}
+    if limits:
+        summary['yield'] = float(np.mean((values >= limits[0]) & (values <= limits[1])))
+    return summary
+
+
+def stack_up(sections_data, samples=DEFAULT_SAMPLES, length_tol=None, diameter_tol=None, density=STEEL_DENSITY,
+             bores=None, thread_model='equal_area', distribution='normal', length_limits=None, seed=None):
+    """Nominal properties, closed-form length stack-up and Monte Carlo summaries of one part."""
+    table, _ = section_arrays(sections_data, thread_model)
+    tol = iso_2768_m(table.length) if length_tol is None else np.broadcast_to(length_tol, (len(table),))
+    values = sample_properties(sections_data, samples, length_tol, diameter_tol, density, bores, thread_model,
+                               distribution, np.random.default_rng(seed))
+    return {
+        'nominal': mass_properties(sections_data, density, bores, thread_model),
+        'length_worst_case': float(tol.sum()),
+        'length_rss': float(np.sqrt((tol ** 2).sum())),
+        'samples': samples,
+        'monte_carlo': {q: summarize(values[q], length_limits if q == 'total_length' else None)
+                        for q in QUANTITIES},
+    }
+
+
+def family_stack_up(parts, samples=DEFAULT_SAMPLES, **kwargs):
+    """stack_up() for every (part name, sections_data) of a family; returns {name: result}."""
+    return {name: stack_up(rows, samples, **kwargs) for name, rows in parts}
+
+
+def format_report(name, result):
+    nominal, mc = result['nominal'], result['monte_carlo']
+    lines = [f"{name}: L = {nominal['total_length']:g} mm, V = {nominal['volume']:.1f} mm^3, "
+             f"m = {nominal['mass']:.2f} g, CG z = {nominal['cg_z']:.3f} mm",
+             f"  I axial = {nominal['i_axial']:.1f} g*mm^2, I transverse (CG) = {nominal['i_transverse']:.1f} g*mm^2",
+             f"  length stack-up: worst case +-{result['length_worst_case']:.3f}, RSS +-{result['length_rss']:.3f} mm",
+             f"  Monte Carlo ({result['samples']:,} samples):"]
+    for q in QUANTITIES:
+        s = mc[q]
+        line = f"    {q:13} mean {s['mean']:12.4f}  std {s['std']:9.4f}  [{s['p0.135']:.4f}, {s['p99.865']:.4f}]"
+        if 'yield' in s:
+            line += f"  yield {s['yield']:.4%}"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    import time
+
+    parser = argparse.ArgumentParser(description='Mass properties and tolerance stack-up of stepped shafts.')
+    parser.add_argument('specs', nargs='?', help='.jsonl/.csv/.scad part specs (default: the three-view sections_data)')
+    parser.add_argument('--samples', type=int, default=DEFAULT_SAMPLES)
+    parser.add_argument('--density', type=float, default=STEEL_DENSITY * 1000, help='g/cm^3 (default: steel)')
+    parser.add_argument('--length-tol', type=float, default=None, help='+- mm on every length (default ISO 2768-m)')
+    parser.add_argument('--diameter-tol', type=float, default=None, help='+- mm on every diameter (default ISO 2768-m)')
+    parser.add_argument('--length-limits', type=float, nargs=2, default=None, help='overall length limits for yield')
+    parser.add_argument('--thread-model', choices=sorted(THREAD_MODELS), default='equal_area')
+    parser.add_argument('--distribution', choices=['normal', 'uniform'], default='normal')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--json', help='write the results to this JSON file')
+    args = parser.parse_args()
+
+    if args.specs:
+        from batch_drawings import read_specs
+
+        parts = list(read_specs(args.specs))
+    else:
+        from stepped_cylinder_three_view_gemini import sections_data
+
+        parts = [('stepped_cylinder', sections_data)]
+    t0 = time.perf_counter()
+    results = family_stack_up(parts, args.samples, length_tol=args.length_tol, diameter_tol=args.diameter_tol,
+                              density=args.density / 1000, thread_model=args.thread_model,
+                              distribution=args.distribution, length_limits=args.length_limits, seed=args.seed)
+    elapsed = time.perf_counter() - t0
+    for name, result in results.items():
+        print(format_report(name, result))
+    print(f'{len(parts)} parts x {args.samples:,} samples in {elapsed:.2f} s')
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=1)
@@ -0,0 +1,262 @@
+"""Phase timings and counters for the drawing pipeline.
+
+The drawing code marks its phases with phase() (a context manager) or
+@profiled (a decorator) and bumps counters with count():
+
+    phase               where
+    import              importing matplotlib for a render
+    setup               creating the Figure and canvas
+    dimensions:<view>   placing a view's labels and dimensions (layout_sheet)
+    layout              moving the views apart and setting the sheet limits
+    view:<view>         building a view's geometry
+    slashes             thread slash lines (stepped_geometry.slash_segments)
+    artists             creating the matplotlib artists (Drawing.draw)
+    text / mathtext     drawing one label, plain or with mathtext markup
+    save                savefig or the SVG/DXF writer
+
+    counter             artists, segments, slash segments, labels, bytes written
+
+Profiling is off unless SHOCK_PROFILE is set (to the trace file written
+when the process exits) or enable() is called. While it is off, phase()
+returns a shared no-op context manager and count() returns at once, so
+the hooks stay in production code paths.
+
+Recorded data is exported as Chrome trace-event JSON (open it in
+chrome://tracing or https://ui.perfetto.dev) and as a summary table of
+calls, total and self time per phase. Worker processes hand their data
+to the parent with drain() and merge().
+
+Usage:
+    SHOCK_PROFILE=trace.json python stepped_cylinder_three_view_gemini.py
+    python batch_drawings.py parts.jsonl -o drawings --profile trace.json
+    python profiling.py trace.json      # summary table of a saved trace
+"""
+import atexit
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+PROFILE_ENV = 'SHOCK_PROFILE'
+
+_enabled = False
+_events = []    # (name, start_ns, duration_ns, pid, tid, args)
+_samples = []   # counter increments: (name, time_ns, n, pid)
+_lock = threading.Lock()
+_OFF = contextlib.nullcontext()
+_matplotlib_instrumented = False
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def enabled():
+    return _enabled
+
+
+def reset():
+    """Drops everything recorded so far (e.g. what a forked worker inherited)."""
+    with _lock:
+        _events.clear()
+        _samples.clear()
+
+
+class _Phase:
+    __slots__ = ('name', 'args', 'start')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        _events.append((self.name, self.start, end - self.start, os.getpid(), threading.get_native_id(), self.args))
+
+
+def phase(name, **args):
+    """Context manager timing one phase; args are shown with the event in the trace."""
+    if not _enabled:
+        return _OFF
+    return _Phase(name, args)
+
+
+def profiled(name=None):
+    """Decorator timing every call of a function as a phase (by default named after the function)."""
+    def decorate(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Phase(label, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name, n=1):
+    """Adds n to a counter."""
+    if not _enabled:
+        return
+    _samples.append((name, time.perf_counter_ns(), n, os.getpid()))
+
+
+def count_written(path):
+    """Counts the size of a file that was just written as bytes written."""
+    if _enabled and isinstance(path, (str, os.PathLike)) and os.path.exists(path):
+        count('bytes written', os.path.getsize(path))
+
+
+def instrument_matplotlib():
+    """Times every label drawn by matplotlib as a text or mathtext phase (only while profiling)."""
+    global _matplotlib_instrumented
+    if not _enabled or _matplotlib_instrumented:
+        return
+    from matplotlib.text import Text
+
+    draw_text = Text.draw
+
+    @functools.wraps(draw_text)
+    def draw(self, renderer):
+        if not _enabled:
+            return draw_text(self, renderer)
+        with _Phase('mathtext' if self.get_text().count('$') >= 2 else 'text', {}):
+            return draw_text(self, renderer)
+
+    Text.draw = draw
+    _matplotlib_instrumented = True
+
+
+# --- Collecting data from worker processes ---
+def drain():
+    """Returns and clears this process's recorded data (None when profiling is off)."""
+    if not _enabled:
+        return None
+    with _lock:
+        data = {'events': list(_events), 'samples': list(_samples)}
+        _events.clear()
+        _samples.clear()
+    return data
+
+
+def merge(data):
+    """Adds data returned by drain() in another process."""
+    if not data:
+        return
+    with _lock:
+        _events.extend(tuple(event) for event in data['events'])
+        _samples.extend(tuple(sample) for sample in data['samples'])
+
+
+# --- Export ---
+def trace_events():
+    """Recorded phases and counter samples as Chrome trace events (times in microseconds).
+
+    Counter events carry each process's running total.
+    """
+    with _lock:
+        events, samples = list(_events), sorted(_samples, key=lambda sample: sample[1])
+    times = [start for _, start, _, _, _, _ in events] + [t for _, t, _, _ in samples]
+    origin = min(times) if times else 0
+    trace = [{'name': name, 'cat': 'drawing', 'ph': 'X', 'ts': (start - origin) / 1000, 'dur': duration / 1000,
+              'pid': pid, 'tid': tid, 'args': args}
+             for name, start, duration, pid, tid, args in events]
+    totals = {}
+    for name, t, n, pid in samples:
+        total = totals[pid, name] = totals.get((pid, name), 0) + n
+        trace.append({'name': name, 'cat': 'counter', 'ph': 'C', 'ts': (t - origin) / 1000, 'pid': pid,
+                      'args': {name: total}})
+    return trace
+
+
+def write_trace(path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': trace_events(), 'displayTimeUnit': 'ms'}, f)
+
+
+def summary(trace):
+    """Per phase: calls, total, self (without nested phases) and max time in ms; final counter totals."""
+    phases = {}
+    by_thread = {}
+    for event in trace:
+        if event['ph'] == 'X':
+            by_thread.setdefault((event['pid'], event['tid']), []).append(event)
+    for events in by_thread.values():
+        events.sort(key=lambda e: (e['ts'], -e['dur']))
+        stack = []  # [event, time spent in nested phases]
+        for event in events + [None]:
+            while stack and (event is None or event['ts'] >= stack[-1][0]['ts'] + stack[-1][0]['dur']):
+                done, nested = stack.pop()
+                row = phases.setdefault(done['name'], [0, 0.0, 0.0, 0.0])
+                row[0] += 1
+                row[1] += done['dur']
+                row[2] += done['dur'] - nested
+                row[3] = max(row[3], done['dur'])
+                if stack:
+                    stack[-1][1] += done['dur']
+            if event is not None:
+                stack.append([event, 0.0])
+
+    finals = {}
+    for event in trace:
+        if event['ph'] == 'C':
+            finals.update({(event['pid'], name): total for name, total in event['args'].items()})
+    counters = {}
+    for (_, name), total in finals.items():
+        counters[name] = counters.get(name, 0) + total
+    return ({name: (calls, total / 1000, own / 1000, longest / 1000) for name, (calls, total, own, longest) in phases.items()},
+            counters)
+
+
+def summary_table(trace=None):
+    """The summary of a trace (by default this process's) as a text table, by self time."""
+    phases, counters = summary(trace_events() if trace is None else trace)
+    lines = [f'{"phase":<20} {"calls":>7} {"total ms":>10} {"self ms":>10} {"max ms":>10}']
+    for name, (calls, total, own, longest) in sorted(phases.items(), key=lambda item: -item[1][2]):
+        lines.append(f'{name:<20} {calls:>7} {total:>10.1f} {own:>10.1f} {longest:>10.1f}')
+    if counters:
+        lines.append('')
+        lines.append(f'{"counter":<20} {"total":>10}')
+        lines += [f'{name:<20} {total:>10}' for name, total in sorted(counters.items())]
+    return '\n'.join(lines)
+
+
+def _write_at_exit(path):
+    if os.getpid() != _owner or not (_events or _samples):
+        return
+    write_trace(path)
+    print(summary_table(), file=sys.stderr)
+    print(f'Profile trace written to {path}', file=sys.stderr)
+
+
+# SHOCK_PROFILE=trace.json profiles the whole run; only the process that imported this first writes the trace
+_owner = os.getpid()
+if os.environ.get(PROFILE_ENV):
+    enable()
+    atexit.register(_write_at_exit, os.environ[PROFILE_ENV])
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Summary table of a Chrome trace written by profiling.py.')
+    parser.add_argument('trace', help='trace JSON file')
+    args = parser.parse_args()
+
+    with open(args.trace, encoding='utf-8') as f:
+        print(summary_table(json.load(f)['traceEvents']))
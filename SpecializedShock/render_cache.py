@@ -0,0 +1,173 @@
+"""Content-addressed cache for rendered drawings.
+
+A drawing is keyed by a SHA-256 hash of its normalized part spec, the style
+settings, the DPI, the output format, RENDERER_VERSION and the source of
+the drawing code. On a hit the stored PNG/SVG is copied to the requested
+output path and nothing is rendered (and matplotlib is never imported).
+
+The cache is a flat directory of <key>.<format> files. Hits refresh the
+file's mtime, so evict() can drop entries older than max_age and then the
+least recently used ones until the directory fits in max_bytes.
+cached_render() runs it on the first miss in a process; batch runs and
+the drawing server evict periodically themselves.
+
+Set SHOCK_RENDER_CACHE to move the cache directory, or to an empty string
+to disable caching.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+RENDERER_VERSION = '1'  # Bump to invalidate every cached drawing
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.render_cache')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_AGE = 30 * 24 * 3600  # seconds
+
+_evicted_dirs = set()  # cache directories cached_render() has already evicted in this process
+
+
+def _normalize(value):
+    """Makes a spec JSON-serializable with a stable form (tuples -> lists, numpy -> Python, rounded floats)."""
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if hasattr(value, 'tolist'):  # numpy arrays and scalars
+        return _normalize(value.tolist())
+    if isinstance(value, bool) or value is None or isinstance(value, (int, str)):
+        return value
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else round(value, 9)
+    return repr(value)
+
+
+def normalize_spec(spec):
+    return json.dumps(_normalize(spec), sort_keys=True, separators=(',', ':'))
+
+
+def source_digest(paths):
+    """Hash of the drawing code, so editing a script invalidates its cached drawings."""
+    h = hashlib.sha256()
+    for path in sorted(os.path.abspath(p) for p in paths):
+        h.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def cache_key(spec, style=None, dpi=None, fmt='png', sources=()):
+    payload = {
+        'spec': _normalize(spec),
+        'style': _normalize(style),
+        'dpi': dpi,
+        'format': fmt,
+        'renderer': RENDERER_VERSION,
+        'source': source_digest(sources) if sources else None,
+    }
+    return hashlib.sha256(normalize_spec(payload).encode()).hexdigest()
+
+
+class RenderCache:
+    """Directory of rendered drawings named by their cache key."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path_for(self, key, fmt):
+        return os.path.join(self.cache_dir, f'{key}.{fmt}')
+
+    def get(self, key, fmt):
+        """Returns the cached file path on a hit, else None."""
+        path = self.path_for(key, fmt)
+        try:
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key, fmt, src_path):
+        """Stores a rendered file; safe against concurrent writers of the same key."""
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(src_path, tmp)
+            os.replace(tmp, self.path_for(key, fmt))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def put_bytes(self, key, fmt, data):
+        """Stores rendered bytes (e.g. from the drawing server) under a key."""
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, self.path_for(key, fmt))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def evict(self):
+        """Drops entries older than max_age, then least recently used ones over max_bytes.
+
+        Returns the number of files removed.
+        """
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        entries.sort()  # oldest first
+        now = time.time()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, path in entries:
+            if now - mtime <= self.max_age and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+
+def default_cache():
+    """The cache configured by SHOCK_RENDER_CACHE, or None when caching is disabled."""
+    cache_dir = os.environ.get('SHOCK_RENDER_CACHE', DEFAULT_CACHE_DIR)
+    return RenderCache(cache_dir) if cache_dir else None
+
+
+def cached_render(output_path, spec, render, dpi=None, style=None, sources=(), cache=None):
+    """Writes the drawing for spec to output_path, rendering only on a cache miss.
+
+    render(output_path) is called on a miss. Returns True on a cache hit.
+    evict() scans the whole directory, so it runs only on the first miss
+    per process and cache directory, not after every one.
+    """
+    cache = default_cache() if cache is None else cache
+    if not cache:
+        render(output_path)
+        return False
+    fmt = os.path.splitext(output_path)[1].lstrip('.').lower() or 'png'
+    key = cache_key(spec, style, dpi, fmt, sources)
+    hit = cache.get(key, fmt)
+    if hit:
+        shutil.copyfile(hit, output_path)
+        return True
+    render(output_path)
+    cache.put(key, fmt, output_path)
+    if cache.cache_dir not in _evicted_dirs:
+        _evicted_dirs.add(cache.cache_dir)
+        cache.evict()
+    return False
@@ -0,0 +1,229 @@
+"""Incremental, parallel export of the .scad models in a directory.
+
+Scans the include/use graph of every .scad file, and re-renders only the
+models whose output is missing or stale. A model is stale when the hash of
+the file and everything it includes (transitively, see
+scad_sections.source_key), the profile or the renderer command has changed
+since the last build. The hashes are kept in <output dir>/.scad_build.json.
+
+Each profile renders into its own subdirectory (<output dir>/draft,
+<output dir>/final) and has its own manifest entries, so switching
+profiles does not overwrite or rebuild the other profile's models.
+
+Files that other files include or use (threads.scad) are libraries, not
+targets: editing one rebuilds every model that depends on it, and those
+renders run in parallel.
+
+Profiles map onto the knobs the models already have, passed as -D overrides:
+    draft - use_detailed_threads = false, $fn = 24 (plain cylinders, fast)
+    final - use_detailed_threads = true, the file's own $fn
+
+The renderer is a command template, OpenSCAD by default:
+    openscad -o {output} {defines} {input}
+{defines} expands to one -D name=value argument per override. Use
+--renderer stub to run the local stub renderer instead (it writes a
+placeholder file without OpenSCAD, for testing the build itself).
+
+Usage:
+    python scad_build.py . -o build --profile draft -j 4
+    python scad_build.py . -o build --renderer stub --dry-run
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import time
+
+from scad_sections import dependencies, openscad_path, source_key
+
+PROFILES = {
+    'draft': {'use_detailed_threads': False, '$fn': 24},
+    'final': {'use_detailed_threads': True},
+}
+DEFAULT_RENDERER = 'openscad -o {output} {defines} {input}'
+STUB_RENDERER = f'{shlex.quote(sys.executable)} {shlex.quote(os.path.abspath(__file__))} --stub-render -o {{output}} {{defines}} {{input}}'
+MANIFEST = '.scad_build.json'
+PROJECTION = re.compile(r'\bprojection\s*\(')  # models with a 2D result
+
+
+class Target:
+    """One model to export: its source, output path and dependencies."""
+
+    def __init__(self, path, output, deps):
+        self.path = path
+        self.output = output
+        self.deps = deps
+        self.key = None
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+
+def scad_value(value):
+    """Formats an override for -D name=value."""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, str):
+        return json.dumps(value)
+    return repr(value)
+
+
+def render_command(template, target, overrides):
+    """Expands the renderer template into an argument list."""
+    defines = [arg for name, value in overrides.items() for arg in ('-D', f'{name}={scad_value(value)}')]
+    command = []
+    for arg in shlex.split(template):
+        if arg == '{defines}':
+            command.extend(defines)
+        else:
+            command.append(arg.format(input=target.path, output=target.output))
+    return command
+
+
+def scan(directory, out_dir, fmt='stl', fmt_2d='dxf'):
+    """Returns the targets of a directory (every .scad file that no other file includes)."""
+    search_path = openscad_path()
+    paths = sorted(os.path.abspath(os.path.join(directory, name))
+                   for name in os.listdir(directory) if name.endswith('.scad'))
+    deps = {path: dependencies(path, search_path) for path in paths}
+    libraries = {resolved for dep_list in deps.values() for _, resolved in dep_list if resolved}
+
+    targets = []
+    for path in paths:
+        if path in libraries:
+            continue
+        with open(path, encoding='utf-8') as f:
+            ext = fmt_2d if PROJECTION.search(f.read()) else fmt
+        output = os.path.join(out_dir, os.path.splitext(os.path.basename(path))[0] + '.' + ext)
+        targets.append(Target(path, output, [resolved or name for name, resolved in deps[path]]))
+    return targets
+
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def manifest_name(target, profile):
+    return f'{profile}/{target.name}'
+
+
+def stale_targets(targets, manifest, profile, renderer, force=False):
+    """Sets each target's build key and returns the ones that need rendering."""
+    search_path = openscad_path()
+    stale = []
+    for target in targets:
+        target.key = source_key(target.path, PROFILES[profile], search_path) + ':' + renderer
+        entry = manifest.get(manifest_name(target, profile))
+        if force or not os.path.exists(target.output) or not entry or entry.get('key') != target.key:
+            stale.append(target)
+    return stale
+
+
+def render_target(target, command, timeout=None):
+    """Runs the renderer for one target; returns (target, seconds, error)."""
+    t0 = time.perf_counter()
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as exc:
+        return target, time.perf_counter() - t0, str(exc)
+    elapsed = time.perf_counter() - t0
+    if result.returncode != 0 or not os.path.exists(target.output):
+        lines = (result.stderr or result.stdout).strip().splitlines()
+        return target, elapsed, lines[-1] if lines else f'exit status {result.returncode}'
+    return target, elapsed, None
+
+
+def build(directory, out_dir, profile='draft', renderer=DEFAULT_RENDERER, jobs=None, force=False,
+          dry_run=False, fmt='stl', timeout=None):
+    """Renders the stale models of a directory in parallel; returns the number of failures."""
+    t0 = time.perf_counter()
+    overrides = PROFILES[profile]
+    renderer = STUB_RENDERER if renderer == 'stub' else renderer
+    profile_dir = os.path.join(out_dir, profile)
+    os.makedirs(profile_dir, exist_ok=True)
+
+    targets = scan(directory, profile_dir, fmt)
+    manifest = load_manifest(out_dir)
+    stale = stale_targets(targets, manifest, profile, renderer, force)
+    print(f'{len(stale)}/{len(targets)} models out of date ({profile} profile)')
+    if dry_run:
+        for target in stale:
+            print('  ' + shlex.join(render_command(renderer, target, overrides)))
+        return 0
+    if not stale:
+        return 0
+
+    # Each render is its own OpenSCAD process; the pool only waits on them
+    failures = 0
+    workers = jobs or os.cpu_count() or 1
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(render_target, target, render_command(renderer, target, overrides), timeout)
+                   for target in stale]
+        for future in concurrent.futures.as_completed(futures):
+            target, elapsed, error = future.result()
+            if error:
+                failures += 1
+                manifest.pop(manifest_name(target, profile), None)
+                print(f'  FAILED {target.name} ({elapsed:.1f} s): {error}')
+            else:
+                manifest[manifest_name(target, profile)] = {
+                    'key': target.key, 'output': os.path.relpath(target.output, out_dir), 'seconds': round(elapsed, 3)}
+                print(f'  built {target.name} -> {target.output} ({elapsed:.1f} s)')
+            save_manifest(out_dir, manifest)  # keep finished work if the build is interrupted
+
+    print(f'Built {len(stale) - failures}/{len(stale)} models with {workers} workers '
+          f'in {time.perf_counter() - t0:.1f} s')
+    return failures
+
+
+def stub_render(argv):
+    """Stand-in for the OpenSCAD CLI: writes a small placeholder output."""
+    parser = argparse.ArgumentParser(prog='scad_build.py --stub-render')
+    parser.add_argument('-o', dest='output', required=True)
+    parser.add_argument('-D', dest='defines', action='append', default=[])
+    parser.add_argument('input')
+    args = parser.parse_args(argv)
+    with open(args.input, 'rb') as f:
+        size = len(f.read())
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(f'solid stub\n// {os.path.basename(args.input)} ({size} bytes) {" ".join(args.defines)}\n'
+                f'endsolid stub\n')
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--stub-render']:
+        stub_render(sys.argv[2:])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description='Re-render the out-of-date .scad models of a directory.')
+    parser.add_argument('directory', nargs='?', default='.', help='directory of .scad files')
+    parser.add_argument('-o', '--out-dir', default='build', help='output directory')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='draft')
+    parser.add_argument('--format', default='stl', help='output format of 3D models (2D models use dxf)')
+    parser.add_argument('--renderer', default=DEFAULT_RENDERER,
+                        help="command template with {input}, {output}, {defines}; 'stub' for the test stub")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='parallel renders (default: CPU count)')
+    parser.add_argument('--timeout', type=float, default=None, help='seconds allowed per model')
+    parser.add_argument('--force', action='store_true', help='rebuild everything')
+    parser.add_argument('--dry-run', action='store_true', help='only list the commands to run')
+    args = parser.parse_args()
+
+    sys.exit(1 if build(args.directory, args.out_dir, args.profile, args.renderer, args.jobs, args.force,
+                        args.dry_run, args.format, args.timeout) else 0)
@@ -0,0 +1,956 @@
+"""Extracts stepped-cylinder section tables from simple OpenSCAD files.
+
+Parses an OpenSCAD file (variables, functions, modules, include/use,
+if/for, module calls), evaluates it, and collects the solids that lie on
+the z axis: cylinder() and metric_thread() under translate([0, 0, z])
+(user modules such as threaded_section() are expanded). Their union is
+turned into the sections_data table used by the drawing code:
+
+    (length, major dia, minor dia, start z, threaded, thread label)
+
+with z shifted so the part starts at 0. Axial cylinders and threads
+subtracted by difference() are reported as bores. Anything off the axis
+(cubes, spheres, rotated or shifted solids) is skipped with a warning.
+
+By default the model is evaluated with use_detailed_threads = true, so
+threads are found even when the file is set up for quick previews.
+
+Results are cached in a directory of JSON files keyed by a hash of the
+file, the files it includes/uses (transitively), the overrides and the
+extractor's own source, so re-extracting a directory only re-parses
+files that changed. Set SHOCK_SCAD_CACHE to move the cache directory, or
+to an empty string to disable it.
+
+Usage:
+    python scad_sections.py stepped_cylinder.scad
+    python scad_sections.py . --json sections.json
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+
+from render_cache import source_digest
+
+PARSER_VERSION = '1'  # Bump to invalidate every cached extraction
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.scad_cache')
+DEFAULT_OVERRIDES = {'use_detailed_threads': True}
+
+# d_minor = d - factor * pitch (external factor as in the hand-made section tables)
+EXTERNAL_MINOR_FACTOR = 1.22
+INTERNAL_MINOR_FACTOR = 1.0825
+
+INCLUDE = re.compile(r'\b(include|use)\s*<([^>]+)>')
+
+
+class ScadError(Exception):
+    pass
+
+
+# --- Tokenizer ---
+TOKEN = re.compile(r'''
+    (?P<space>\s+|//[^\n]*|/\*.*?\*/)
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<string>"(?:[^"\\]|\\.)*")
+  | (?P<name>\$?[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<op>==|!=|<=|>=|&&|\|\||[-+*/%^<>=!?:;,.(){}\[\]#])
+''', re.VERBOSE | re.DOTALL)
+
+KEYWORDS = {'module', 'function', 'if', 'else', 'for', 'let', 'true', 'false', 'undef', 'each'}
+
+
+def tokenize(source):
+    tokens = []
+    pos = 0
+    while pos < len(source):
+        m = TOKEN.match(source, pos)
+        if not m:
+            line = source.count('\n', 0, pos) + 1
+            raise ScadError(f'Unexpected character {source[pos]!r} on line {line}')
+        pos = m.end()
+        kind = m.lastgroup
+        if kind == 'space':
+            continue
+        tokens.append((kind, m.group()))
+    tokens.append(('eof', None))
+    return tokens
+
+
+# --- Parser ---
+# Statements:  ('assign', name, expr) | ('module', name, params, body) | ('function', name, params, expr)
+#              ('call', name, args, child) | ('block', stmts) | ('if', cond, then, else) | ('for', assigns, body)
+#              ('include', kind, path)
+# Expressions: ('num', v) | ('str', s) | ('const', v) | ('var', name) | ('vec', items) | ('range', a, step, b)
+#              ('bin', op, a, b) | ('un', op, a) | ('tern', c, a, b) | ('fcall', name, args)
+#              ('index', e, i) | ('member', e, name) | ('let', assigns, e)
+BINARY_PRECEDENCE = [('||',), ('&&',), ('==', '!='), ('<', '<=', '>', '>='), ('+', '-'), ('*', '/', '%'), ('^',)]
+
+
+class Parser:
+    def __init__(self, source):
+        self.includes = [(m.group(1), m.group(2).strip()) for m in INCLUDE.finditer(_strip_comments(source))]
+        self.tokens = tokenize(INCLUDE.sub(' ', source))
+        self.pos = 0
+
+    def peek(self, offset=0):
+        return self.tokens[self.pos + offset]
+
+    def next(self):
+        tok = self.tokens[self.pos]
+        self.pos += 1
+        return tok
+
+    def accept(self, value):
+        if self.peek()[1] == value and self.peek()[0] != 'string':
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, value):
+        if not self.accept(value):
+            raise ScadError(f'Expected {value!r} but found {self.peek()[1]!r}')
+
+    def parse(self):
+        stmts = [('include', kind, path) for kind, path in self.includes]
+        while self.peek()[0] != 'eof':
+            stmt = self.statement()
+            if stmt is not None:
+                stmts.append(stmt)
+        return stmts
+
+    def statement(self):
+        kind, value = self.peek()
+        if value == ';':
+            self.next()
+            return None
+        if value == '{':
+            self.next()
+            stmts = []
+            while not self.accept('}'):
+                stmt = self.statement()
+                if stmt is not None:
+                    stmts.append(stmt)
+            return ('block', stmts)
+        if value in ('*', '%'):  # disabled / background: not part of the model
+            self.next()
+            self.statement()
+            return None
+        if value in ('!', '#'):
+            self.next()
+            return self.statement()
+        if kind == 'name' and value == 'module':
+            self.next()
+            name = self.next()[1]
+            params = self.params()
+            return ('module', name, params, self.statement())
+        if kind == 'name' and value == 'function':
+            self.next()
+            name = self.next()[1]
+            params = self.params()
+            self.expect('=')
+            expr = self.expr()
+            self.expect(';')
+            return ('function', name, params, expr)
+        if kind == 'name' and value == 'if':
+            self.next()
+            self.expect('(')
+            cond = self.expr()
+            self.expect(')')
+            then = self.statement()
+            other = self.statement() if self.accept('else') else None
+            return ('if', cond, then, other)
+        if kind == 'name' and value in ('for', 'intersection_for'):
+            self.next()
+            self.expect('(')
+            assigns = self.assignments(')')
+            return ('for', assigns, self.statement())
+        if kind == 'name' and self.peek(1)[1] == '=':
+            self.next()
+            self.next()
+            expr = self.expr()
+            self.expect(';')
+            return ('assign', value, expr)
+        if kind == 'name':
+            self.next()
+            self.expect('(')
+            args = self.arguments()
+            return ('call', value, args, self.statement())
+        raise ScadError(f'Unexpected token {value!r}')
+
+    def params(self):
+        self.expect('(')
+        params = []
+        while not self.accept(')'):
+            name = self.next()[1]
+            default = self.expr() if self.accept('=') else None
+            params.append((name, default))
+            self.accept(',')
+        return params
+
+    def assignments(self, close):
+        assigns = []
+        while not self.accept(close):
+            name = self.next()[1]
+            self.expect('=')
+            assigns.append((name, self.expr()))
+            self.accept(',')
+        return assigns
+
+    def arguments(self):
+        args = []
+        while not self.accept(')'):
+            if self.peek()[0] == 'name' and self.peek(1)[1] == '=' and self.peek(2)[1] != '=':
+                name = self.next()[1]
+                self.next()
+                args.append((name, self.expr()))
+            else:
+                args.append((None, self.expr()))
+            self.accept(',')
+        return args
+
+    def expr(self):
+        if self.peek()[1] == 'let' and self.peek(1)[1] == '(':
+            self.next()
+            self.next()
+            assigns = self.assignments(')')
+            return ('let', assigns, self.expr())
+        cond = self.binary(0)
+        if self.accept('?'):
+            a = self.expr()
+            self.expect(':')
+            return ('tern', cond, a, self.expr())
+        return cond
+
+    def binary(self, level):
+        if level == len(BINARY_PRECEDENCE):
+            return self.unary()
+        left = self.binary(level + 1)
+        while self.peek()[0] == 'op' and self.peek()[1] in BINARY_PRECEDENCE[level]:
+            op = self.next()[1]
+            left = ('bin', op, left, self.binary(level + 1))
+        return left
+
+    def unary(self):
+        if self.peek()[0] == 'op' and self.peek()[1] in ('-', '+', '!'):
+            op = self.next()[1]
+            return ('un', op, self.unary())
+        return self.postfix(self.primary())
+
+    def postfix(self, node):
+        while True:
+            if self.accept('['):
+                index = self.expr()
+                self.expect(']')
+                node = ('index', node, index)
+            elif self.accept('.'):
+                node = ('member', node, self.next()[1])
+            else:
+                return node
+
+    def primary(self):
+        kind, value = self.next()
+        if kind == 'number':
+            return ('num', float(value))
+        if kind == 'string':
+            return ('str', bytes(value[1:-1], 'utf-8').decode('unicode_escape', errors='replace')
+                    if '\\' in value else value[1:-1])
+        if kind == 'name':
+            if value in ('true', 'false'):
+                return ('const', value == 'true')
+            if value == 'undef':
+                return ('const', None)
+            if self.accept('('):
+                return ('fcall', value, self.arguments())
+            return ('var', value)
+        if value == '(':
+            node = self.expr()
+            self.expect(')')
+            return node
+        if value == '[':
+            if self.accept(']'):
+                return ('vec', [])
+            first = self.expr()
+            if self.accept(':'):
+                second = self.expr()
+                if self.accept(':'):
+                    third = self.expr()
+                    self.expect(']')
+                    return ('range', first, second, third)
+                self.expect(']')
+                return ('range', first, ('num', 1.0), second)
+            items = [first]
+            while self.accept(','):
+                if self.peek()[1] == ']':
+                    break
+                items.append(self.expr())
+            self.expect(']')
+            return ('vec', items)
+        raise ScadError(f'Unexpected token {value!r} in expression')
+
+
+def _strip_comments(source):
+    return re.sub(r'//[^\n]*|/\*.*?\*/', ' ', source, flags=re.DOTALL)
+
+
+def parse(source):
+    return Parser(source).parse()
+
+
+# --- Evaluator ---
+def _deg(f):
+    return lambda x: f(math.radians(x))
+
+
+def _rad(f):
+    return lambda x: math.degrees(f(x))
+
+
+BUILTIN_FUNCTIONS = {
+    'sin': _deg(math.sin), 'cos': _deg(math.cos), 'tan': _deg(math.tan),
+    'asin': _rad(math.asin), 'acos': _rad(math.acos), 'atan': _rad(math.atan),
+    'atan2': lambda y, x: math.degrees(math.atan2(y, x)),
+    'sqrt': math.sqrt, 'abs': abs, 'ceil': math.ceil, 'floor': math.floor, 'round': round,
+    'pow': math.pow, 'exp': math.exp, 'ln': math.log, 'log': math.log10,
+    'min': lambda *a: min(a[0]) if len(a) == 1 else min(a),
+    'max': lambda *a: max(a[0]) if len(a) == 1 else max(a),
+    'sign': lambda x: (x > 0) - (x < 0), 'len': len,
+    'norm': lambda v: math.sqrt(sum(x * x for x in v)),
+    'concat': lambda *a: [x for v in a for x in v],
+    'str': lambda *a: ''.join(_str(x) for x in a),
+}
+
+
+def _str(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float):
+        return f'{value:g}'
+    if value is None:
+        return 'undef'
+    return str(value)
+
+
+def _binary(op, a, b):
+    if op == '&&':
+        return bool(a) and bool(b)
+    if op == '||':
+        return bool(a) or bool(b)
+    if op == '==':
+        return a == b
+    if op == '!=':
+        return a != b
+    if a is None or b is None:
+        return None
+    if isinstance(a, list) or isinstance(b, list):
+        if op in ('+', '-') and isinstance(a, list) and isinstance(b, list):
+            return [_binary(op, x, y) for x, y in zip(a, b)]
+        if op in ('*', '/') and isinstance(a, list) and not isinstance(b, list):
+            return [_binary(op, x, b) for x in a]
+        if op == '*' and isinstance(b, list) and not isinstance(a, list):
+            return [_binary(op, a, y) for y in b]
+        return None
+    try:
+        if op == '+':
+            return a + b
+        if op == '-':
+            return a - b
+        if op == '*':
+            return a * b
+        if op == '/':
+            return a / b if b else None
+        if op == '%':
+            return math.fmod(a, b) if b else None
+        if op == '^':
+            return a ** b
+        if op == '<':
+            return a < b
+        if op == '<=':
+            return a <= b
+        if op == '>':
+            return a > b
+        if op == '>=':
+            return a >= b
+    except TypeError:
+        return None
+    raise ScadError(f'Unknown operator {op}')
+
+
+class Scope:
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.vars = {}
+        self.modules = {}
+        self.functions = {}
+
+    def lookup(self, table, name):
+        scope = self
+        while scope is not None:
+            if name in getattr(scope, table):
+                return getattr(scope, table)[name]
+            scope = scope.parent
+        raise KeyError(name)
+
+
+class Solid:
+    """An axial cylinder or thread found in the model (z in model coordinates)."""
+
+    def __init__(self, z0, z1, d_major, d_minor, threaded=False, label=None, negative=False):
+        self.z0, self.z1 = min(z0, z1), max(z0, z1)
+        self.d_major, self.d_minor = d_major, d_minor
+        self.threaded, self.label = threaded, label
+        self.negative = negative
+
+
+def thread_label(diameter, pitch):
+    """Thread callout as written in the section tables ('M10x1.25', 'M8x1.0')."""
+    p = f'{pitch:.2f}'.rstrip('0')
+    return f'M{diameter:g}x{p}0' if p.endswith('.') else f'M{diameter:g}x{p}'
+
+
+class Evaluator:
+    """Walks a parsed model and collects the axial solids."""
+
+    def __init__(self, path, overrides=None, search_path=()):
+        self.path = os.path.abspath(path)
+        self.overrides = dict(DEFAULT_OVERRIDES if overrides is None else overrides)
+        self.search_path = list(search_path)
+        self.solids = []
+        self.warnings = []
+        self._warned = set()
+
+    def warn(self, message):
+        if message not in self._warned:
+            self._warned.add(message)
+            self.warnings.append(message)
+
+    # --- Files ---
+    def resolve(self, name, base_dir):
+        for directory in [base_dir] + self.search_path:
+            candidate = os.path.join(directory, name)
+            if os.path.exists(candidate):
+                return candidate
+        return None
+
+    def run_file(self, path, scope, geometry=True, seen=()):
+        with open(path, encoding='utf-8') as f:
+            stmts = parse(f.read())
+        self.run_scope(stmts, scope, _Context(), os.path.dirname(path), geometry, seen + (os.path.abspath(path),))
+
+    def run(self):
+        scope = Scope()
+        self.run_file(self.path, scope)
+        return self
+
+    # --- Statements ---
+    def run_scope(self, stmts, scope, ctx, base_dir, geometry=True, seen=()):
+        """OpenSCAD order: definitions and assignments first, then instantiations."""
+        for stmt in stmts:
+            if stmt[0] == 'include':
+                _, kind, name = stmt
+                path = self.resolve(name, base_dir)
+                if path is None:
+                    self.warn(f'{kind} <{name}> not found')
+                elif os.path.abspath(path) not in seen:
+                    self.run_file(path, scope, geometry=(kind == 'include' and geometry), seen=seen)
+            elif stmt[0] == 'module':
+                scope.modules[stmt[1]] = (stmt[2], stmt[3], scope)
+            elif stmt[0] == 'function':
+                scope.functions[stmt[1]] = (stmt[2], stmt[3], scope)
+        for stmt in stmts:
+            if stmt[0] == 'assign':
+                name = stmt[1]
+                if name in self.overrides and scope.parent is None:
+                    scope.vars[name] = self.overrides[name]
+                else:
+                    scope.vars[name] = self.eval(stmt[2], scope)
+        if not geometry:
+            return
+        for stmt in stmts:
+            if stmt[0] in ('call', 'block', 'if', 'for'):
+                self.instantiate(stmt, scope, ctx, base_dir)
+
+    def instantiate(self, stmt, scope, ctx, base_dir):
+        if stmt is None:
+            return
+        kind = stmt[0]
+        if kind == 'block':
+            inner = Scope(scope)
+            self.run_scope(stmt[1], inner, ctx, base_dir)
+        elif kind == 'if':
+            branch = stmt[2] if self.eval(stmt[1], scope) else stmt[3]
+            self.instantiate(branch, scope, ctx, base_dir)
+        elif kind == 'for':
+            self.instantiate_for(stmt[1], stmt[2], scope, ctx, base_dir)
+        elif kind == 'call':
+            self.call_module(stmt, scope, ctx, base_dir)
+        elif kind in ('assign', 'module', 'function', 'include'):
+            self.run_scope([stmt], scope, ctx, base_dir)
+
+    def instantiate_for(self, assigns, body, scope, ctx, base_dir):
+        if not assigns:
+            self.instantiate(body, scope, ctx, base_dir)
+            return
+        (name, expr), rest = assigns[0], assigns[1:]
+        values = self.eval(expr, scope)
+        for value in (values if isinstance(values, list) else [values]):
+            inner = Scope(scope)
+            inner.vars[name] = value
+            self.instantiate_for(rest, body, inner, ctx, base_dir)
+
+    def children(self, child, scope, ctx, base_dir):
+        self.instantiate(child, scope, ctx, base_dir)
+
+    def call_module(self, stmt, scope, ctx, base_dir):
+        _, name, args, child = stmt
+        handler = getattr(self, 'module_' + name, None)
+        if handler is not None:
+            handler(self.bind_builtin(args, scope), child, scope, ctx, base_dir)
+            return
+        if name == 'children':
+            if ctx.children is not None:
+                child_stmt, child_scope, child_ctx = ctx.children
+                self.instantiate(child_stmt, child_scope, ctx.with_children(child_ctx.children), base_dir)
+            return
+        try:
+            params, body, def_scope = scope.lookup('modules', name)
+        except KeyError:
+            if name not in IGNORED_MODULES:
+                self.warn(f'unknown module {name}() ignored')
+            return
+        inner = Scope(def_scope)
+        for (pname, default) in params:
+            inner.vars[pname] = self.eval(default, def_scope) if default is not None else None
+        positional = [self.eval(e, scope) for n, e in args if n is None]
+        for (pname, _), value in zip(params, positional):
+            inner.vars[pname] = value
+        for n, e in args:
+            if n is not None:
+                inner.vars[n] = self.eval(e, scope)
+        body_ctx = ctx.with_children((child, scope, ctx)) if child is not None else ctx.with_children(None)
+        self.instantiate(body, inner, body_ctx, base_dir)
+
+    def bind_builtin(self, args, scope):
+        """Evaluates builtin-module arguments into {'_0': first positional, ..., name: value}."""
+        bound = {}
+        positional = 0
+        for name, expr in args:
+            value = self.eval(expr, scope)
+            if name is None:
+                bound[f'_{positional}'] = value
+                positional += 1
+            else:
+                bound[name] = value
+        return bound
+
+    # --- Builtin modules ---
+    def module_union(self, args, child, scope, ctx, base_dir):
+        self.instantiate(child, scope, ctx, base_dir)
+
+    module_group = module_color = module_render = module_union
+
+    def module_difference(self, args, child, scope, ctx, base_dir):
+        stmts = child[1] if child and child[0] == 'block' else [child]
+        inner = Scope(scope)
+        geometry = [s for s in stmts if s and s[0] in ('call', 'block', 'if', 'for')]
+        self.run_scope([s for s in stmts if s and s not in geometry], inner, ctx, base_dir)
+        for i, stmt in enumerate(geometry):
+            if i == 0:
+                self.instantiate(stmt, inner, ctx, base_dir)
+            elif not ctx.negative:
+                self.instantiate(stmt, inner, ctx.subtract(), base_dir)
+
+    def module_intersection(self, args, child, scope, ctx, base_dir):
+        self.warn('intersection() approximated by its first child')
+        stmts = child[1] if child and child[0] == 'block' else [child]
+        geometry = [s for s in stmts if s and s[0] in ('call', 'block', 'if', 'for')]
+        if geometry:
+            self.instantiate(geometry[0], scope, ctx, base_dir)
+
+    def module_translate(self, args, child, scope, ctx, base_dir):
+        v = list(args.get('v', args.get('_0')) or [0, 0, 0]) + [0, 0, 0]
+        x, y, z = (float(c or 0) for c in v[:3])
+        self.instantiate(child, scope, ctx.translate(x, y, z), base_dir)
+
+    def module_rotate(self, args, child, scope, ctx, base_dir):
+        a = args.get('a', args.get('_0'))
+        v = args.get('v', args.get('_1'))
+        if isinstance(a, list):
+            a = (list(a) + [0, 0, 0])[:3]
+            axial = all(float(c or 0) % 360 == 0 for c in a[:2])
+        elif v is not None:
+            v = (list(v) + [0, 0, 0])[:3]
+            axial = (not a) or (v[0] == 0 and v[1] == 0)
+        else:
+            axial = True  # rotate(a) turns about z
+        self.instantiate(child, scope, ctx if axial else ctx.off_axis(), base_dir)
+
+    def module_mirror(self, args, child, scope, ctx, base_dir):
+        v = (list(args.get('v', args.get('_0')) or [0, 0, 0]) + [0, 0, 0])[:3]
+        self.instantiate(child, scope, ctx if not v[2] else ctx.off_axis(), base_dir)
+
+    def module_scale(self, args, child, scope, ctx, base_dir):
+        self.instantiate(child, scope, ctx.off_axis(), base_dir)
+
+    module_multmatrix = module_resize = module_hull = module_minkowski = module_scale
+
+    def module_projection(self, args, child, scope, ctx, base_dir):
+        pass  # 2D output
+
+    module_linear_extrude = module_rotate_extrude = module_projection
+
+    def module_echo(self, args, child, scope, ctx, base_dir):
+        self.instantiate(child, scope, ctx, base_dir)
+
+    def module_cylinder(self, args, child, scope, ctx, base_dir):
+        h = _num(args.get('h', args.get('_0')), 1.0)
+        r1 = _radius(args, 'r1', 'd1', args.get('_1'))
+        r2 = _radius(args, 'r2', 'd2', args.get('_2'))
+        r = _radius(args, 'r', 'd', None)
+        r1 = r if r1 is None else r1
+        r2 = r if r2 is None else r2
+        r1 = 1.0 if r1 is None else r1
+        r2 = r1 if r2 is None else r2
+        if r1 != r2:
+            self.warn('tapered cylinder() drawn with its larger diameter')
+        z0 = -h / 2 if args.get('center') is True else 0.0
+        self.add_solid(ctx, z0, z0 + h, 2 * max(r1, r2), 2 * max(r1, r2), 'cylinder()')
+
+    def module_metric_thread(self, args, child, scope, ctx, base_dir):
+        names = ['diameter', 'pitch', 'length', 'internal', 'n_starts']
+        values = {n: args.get(n, args.get(f'_{i}')) for i, n in enumerate(names)}
+        diameter = _num(values['diameter'], 8.0)
+        pitch = _num(values['pitch'], 1.0)
+        length = _num(values['length'], 1.0)
+        internal = bool(values['internal'])
+        factor = INTERNAL_MINOR_FACTOR if internal else EXTERNAL_MINOR_FACTOR
+        self.add_solid(ctx, 0.0, length, diameter, round(diameter - factor * pitch, 3), 'metric_thread()',
+                       threaded=True, label=thread_label(diameter, pitch))
+
+    def module_english_thread(self, args, child, scope, ctx, base_dir):
+        names = ['diameter', 'threads_per_inch', 'length', 'internal']
+        values = {n: args.get(n, args.get(f'_{i}')) for i, n in enumerate(names)}
+        diameter = _num(values['diameter'], 0.25) * 25.4
+        pitch = 25.4 / _num(values['threads_per_inch'], 20)
+        length = _num(values['length'], 1.0) * 25.4
+        factor = INTERNAL_MINOR_FACTOR if values['internal'] else EXTERNAL_MINOR_FACTOR
+        self.add_solid(ctx, 0.0, length, diameter, round(diameter - factor * pitch, 3), 'english_thread()',
+                       threaded=True, label=f'{_num(values["diameter"], 0.25):g}-{_num(values["threads_per_inch"], 20):g} UN')
+
+    def non_axial(self, name):
+        def handler(args, child, scope, ctx, base_dir):
+            if not ctx.negative:
+                self.warn(f'{name}() is not a coaxial cylinder; left out of the section table')
+        return handler
+
+    def add_solid(self, ctx, z0, z1, d_major, d_minor, what, threaded=False, label=None):
+        if ctx.off:
+            if not ctx.negative:
+                self.warn(f'{what} off the z axis; left out of the section table')
+            return
+        self.solids.append(Solid(ctx.z + z0, ctx.z + z1, d_major, d_minor, threaded, label, ctx.negative))
+
+    def __getattr__(self, name):
+        if name.startswith('module_') and name[7:] in NON_AXIAL_MODULES:
+            return self.non_axial(name[7:])
+        raise AttributeError(name)
+
+    # --- Expressions ---
+    def eval(self, node, scope):
+        kind = node[0]
+        if kind in ('num', 'str', 'const'):
+            return node[1]
+        if kind == 'var':
+            try:
+                return scope.lookup('vars', node[1])
+            except KeyError:
+                if node[1] not in ('$fn', '$fa', '$fs', '$t', '$preview', '$children'):
+                    self.warn(f'unknown variable {node[1]}')
+                return None
+        if kind == 'vec':
+            return [self.eval(e, scope) for e in node[1]]
+        if kind == 'range':
+            start, step, end = (self.eval(e, scope) for e in node[1:])
+            if None in (start, step, end) or step == 0:
+                return []
+            count = int(math.floor((end - start) / step + 1e-9)) + 1
+            return [start + i * step for i in range(max(count, 0))]
+        if kind == 'bin':
+            return _binary(node[1], self.eval(node[2], scope), self.eval(node[3], scope))
+        if kind == 'un':
+            value = self.eval(node[2], scope)
+            if node[1] == '!':
+                return not value
+            if value is None:
+                return None
+            if isinstance(value, list):
+                return [-x for x in value] if node[1] == '-' else value
+            return -value if node[1] == '-' else value
+        if kind == 'tern':
+            return self.eval(node[2] if self.eval(node[1], scope) else node[3], scope)
+        if kind == 'index':
+            value, index = self.eval(node[1], scope), self.eval(node[2], scope)
+            try:
+                return value[int(index)]
+            except (TypeError, IndexError, ValueError):
+                return None
+        if kind == 'member':
+            value = self.eval(node[1], scope)
+            try:
+                return value['xyz'.index(node[2])]
+            except (TypeError, IndexError, ValueError):
+                return None
+        if kind == 'let':
+            inner = Scope(scope)
+            for name, expr in node[1]:
+                inner.vars[name] = self.eval(expr, inner)
+            return self.eval(node[2], inner)
+        if kind == 'fcall':
+            return self.call_function(node[1], node[2], scope)
+        raise ScadError(f'Cannot evaluate {kind}')
+
+    def call_function(self, name, args, scope):
+        try:
+            params, body, def_scope = scope.lookup('functions', name)
+        except KeyError:
+            if name in BUILTIN_FUNCTIONS:
+                values = [self.eval(e, scope) for _, e in args]
+                try:
+                    return BUILTIN_FUNCTIONS[name](*values)
+                except (TypeError, ValueError, ZeroDivisionError):
+                    return None
+            self.warn(f'unknown function {name}()')
+            return None
+        inner = Scope(def_scope)
+        for pname, default in params:
+            inner.vars[pname] = self.eval(default, def_scope) if default is not None else None
+        positional = [self.eval(e, scope) for n, e in args if n is None]
+        for (pname, _), value in zip(params, positional):
+            inner.vars[pname] = value
+        for n, e in args:
+            if n is not None:
+                inner.vars[n] = self.eval(e, scope)
+        return self.eval(body, inner)
+
+
+IGNORED_MODULES = {'square', 'circle', 'polygon', 'text', 'import', 'surface', 'offset', 'assert'}
+NON_AXIAL_MODULES = {'cube', 'sphere', 'polyhedron'}
+
+
+class _Context:
+    """Placement of the current subtree: z offset, subtracted or not, off the z axis or not."""
+
+    def __init__(self, z=0.0, negative=False, off=False, children=None):
+        self.z, self.negative, self.off, self.children = z, negative, off, children
+
+    def translate(self, x, y, z):
+        return _Context(self.z + z, self.negative, self.off or bool(x) or bool(y), self.children)
+
+    def off_axis(self):
+        return _Context(self.z, self.negative, True, self.children)
+
+    def subtract(self):
+        return _Context(self.z, True, self.off, self.children)
+
+    def with_children(self, children):
+        return _Context(self.z, self.negative, self.off, children)
+
+
+def _num(value, default):
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else default
+
+
+def _radius(args, r_name, d_name, positional):
+    if _num(args.get(r_name), None) is not None:
+        return float(args[r_name])
+    if _num(args.get(d_name), None) is not None:
+        return float(args[d_name]) / 2
+    return _num(positional, None)
+
+
+# --- Section table ---
+def _round(value):
+    return round(value, 6) + 0.0
+
+
+def section_table(solids):
+    """Turns the union of the positive solids into sections_data rows.
+
+    Returns (sections, z_origin, gaps): rows start at z = 0, z_origin is the
+    model z of that point, gaps lists uncovered (z0, z1) intervals.
+    """
+    positive = [s for s in solids if not s.negative]
+    if not positive:
+        return [], 0.0, []
+    z_origin = min(s.z0 for s in positive)
+    cuts = sorted({_round(z) for s in positive for z in (s.z0, s.z1)})
+    rows, gaps = [], []
+    for a, b in zip(cuts, cuts[1:]):
+        covering = [s for s in positive if _round(s.z0) <= a and _round(s.z1) >= b]
+        if not covering:
+            gaps.append((_round(a - z_origin), _round(b - z_origin)))
+            continue
+        top = max(covering, key=lambda s: (s.d_major, s.threaded))
+        key = (top.d_major, top.d_minor, top.threaded, top.label)
+        if rows and rows[-1][1] == key and rows[-1][0][1] == a:
+            rows[-1][0][1] = b
+        else:
+            rows.append(([a, b], key))
+    sections = [(_round(b - a), d_major, d_minor, _round(a - z_origin), threaded, label)
+                for (a, b), (d_major, d_minor, threaded, label) in rows]
+    return sections, _round(z_origin), gaps
+
+
+def bore_table(solids, z_origin=0.0):
+    """Axial solids removed by difference(), in the same row format as the sections."""
+    rows = [(_round(s.z1 - s.z0), s.d_major, s.d_minor, _round(s.z0 - z_origin), s.threaded, s.label)
+            for s in sorted((s for s in solids if s.negative), key=lambda s: s.z0)]
+    return list(dict.fromkeys(rows))
+
+
+# --- Cache ---
+def dependencies(path, search_path=(), _seen=None):
+    """Files included or used by path, transitively (a list of (name, resolved path or None))."""
+    seen = set() if _seen is None else _seen
+    deps = []
+    with open(path, encoding='utf-8') as f:
+        source = _strip_comments(f.read())
+    base_dir = os.path.dirname(os.path.abspath(path))
+    for _, name in INCLUDE.findall(source):
+        resolved = None
+        for directory in [base_dir] + list(search_path):
+            candidate = os.path.join(directory, name)
+            if os.path.exists(candidate):
+                resolved = os.path.abspath(candidate)
+                break
+        deps.append((name, resolved))
+        if resolved and resolved not in seen:
+            seen.add(resolved)
+            deps.extend(dependencies(resolved, search_path, seen))
+    return deps
+
+
+def source_key(path, overrides=None, search_path=()):
+    """Hash of the file, its transitive includes and the overrides (what an OpenSCAD render depends on)."""
+    h = hashlib.sha256()
+    h.update(json.dumps(DEFAULT_OVERRIDES if overrides is None else overrides, sort_keys=True).encode())
+    for name, resolved in [(os.path.basename(path), os.path.abspath(path))] + dependencies(path, search_path):
+        h.update(name.encode())
+        if resolved is None:
+            h.update(b'<missing>')
+        else:
+            with open(resolved, 'rb') as f:
+                h.update(hashlib.sha256(f.read()).digest())
+    return h.hexdigest()
+
+
+def file_key(path, overrides=None, search_path=()):
+    """Parse cache key: source_key() plus PARSER_VERSION and this module's source."""
+    h = hashlib.sha256(PARSER_VERSION.encode())
+    h.update(source_digest([__file__]).encode())
+    h.update(source_key(path, overrides, search_path).encode())
+    return h.hexdigest()
+
+
+def openscad_path():
+    """Library directories from OPENSCADPATH, searched after the including file's directory."""
+    return [p for p in os.environ.get('OPENSCADPATH', '').split(os.pathsep) if p]
+
+
+def _cache_dir():
+    return os.environ.get('SHOCK_SCAD_CACHE', DEFAULT_CACHE_DIR)
+
+
+def _from_json(result):
+    for table in ('sections', 'bores'):
+        result[table] = [tuple(row) for row in result[table]]
+    result['gaps'] = [tuple(gap) for gap in result['gaps']]
+    return result
+
+
+def extract(path, overrides=None, cache_dir=None):
+    """Extracts {'file', 'sections', 'bores', 'gaps', 'z_origin', 'warnings', 'cached'} from a .scad file."""
+    search_path = openscad_path()
+    cache_dir = _cache_dir() if cache_dir is None else cache_dir
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, file_key(path, overrides, search_path) + '.json')
+        if os.path.exists(cache_path):
+            with open(cache_path, encoding='utf-8') as f:
+                result = _from_json(json.load(f))
+            result.update(file=path, cached=True)
+            return result
+
+    evaluator = Evaluator(path, overrides, search_path).run()
+    sections, z_origin, gaps = section_table(evaluator.solids)
+    warnings = list(evaluator.warnings)
+    if gaps:
+        warnings.append(f'no solid on the axis between z = {gaps}')
+    result = {'file': path, 'sections': sections, 'bores': bore_table(evaluator.solids, z_origin),
+              'gaps': gaps, 'z_origin': z_origin, 'warnings': warnings}
+
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = cache_path + f'.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        os.replace(tmp, cache_path)
+    result['cached'] = False
+    return result
+
+
+def extract_sections(path, overrides=None, cache_dir=None):
+    """The sections_data table of a .scad file."""
+    return extract(path, overrides, cache_dir)['sections']
+
+
+def extract_directory(directory, overrides=None, cache_dir=None):
+    """Extracts every .scad file in a directory; returns {path: result}. Parse errors are reported, not raised."""
+    results = {}
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.scad'):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            results[path] = extract(path, overrides, cache_dir)
+        except (ScadError, RecursionError, OSError) as exc:
+            results[path] = {'file': path, 'error': str(exc)}
+    return results
+
+
+def format_table(result):
+    lines = [f"# {result['file']}" + (' (cached)' if result.get('cached') else '')]
+    if 'error' in result:
+        return '\n'.join(lines + [f"#   error: {result['error']}"])
+    lines.append('# (Length, Major Diameter, Minor Diameter, Start Z, Threaded, Thread Label)')
+    lines.extend(f'    {row!r},' for row in result['sections'])
+    for row in result['bores']:
+        lines.append(f'#   bore: {row!r}')
+    for warning in result['warnings']:
+        lines.append(f'#   warning: {warning}')
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Extract section tables from OpenSCAD files.')
+    parser.add_argument('paths', nargs='+', help='.scad files or directories')
+    parser.add_argument('--json', help='write all results to this JSON file')
+    parser.add_argument('--preview-threads', action='store_true',
+                        help='keep use_detailed_threads as set in the file')
+    args = parser.parse_args()
+
+    overrides = {} if args.preview_threads else None
+    results = {}
+    for path in args.paths:
+        if os.path.isdir(path):
+            results.update(extract_directory(path, overrides))
+        else:
+            results[path] = extract(path, overrides)
+    for result in results.values():
+        print(format_table(result))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    sys.exit(1 if any('error' in r for r in results.values()) else 0)
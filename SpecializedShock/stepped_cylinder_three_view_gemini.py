@@ -1,7 +1,19 @@
-import matplotlib.pyplot as plt
-from matplotlib.patches import Circle
+import os
+import threading
+
 import numpy as np
 
+import dimension_layout
+import drafting
+import profiling
+import stepped_geometry
+from dimension_layout import LINE_CLEARANCE, GridIndex, Layout, arrange, line_box, text_scale, text_size
+from drafting import DETAIL_LEVELS, Drawing, segments
+from profiling import phase
+from render_cache import cached_render
+from stepped_geometry import (SectionTable, horizontal_view, outline_segments, project,
+                              slash_segments, termination_segments, vertical_view)
+
 # --- Stepped Cylinder Dimensions (Analyzed from stepped_cylinder.scad) ---
 # Sections: (Length, Major Diameter, Minor Diameter, Start Z, Threaded, Thread Label)
 sections_data = [
@@ -12,218 +24,362 @@ sections_data = [
     (7.0, 8.00, 6.78, 74.5, True, 'M8x1.0')        # Section 5 (M8 Thread - Right End)
 ]
 
-TOTAL_LENGTH = 81.5
-MAX_DIAMETER = 10.05
-MAX_RADIUS = MAX_DIAMETER / 2
-
 # Plotting constants
+FIGSIZE = (15, 10) # Increased height for new dimensions
 SPACING = 15
 PADDING = 5
 X0 = PADDING
 Y0 = PADDING
-DIM_OFFSET = 10 
-TEXT_OFFSET = 3 
+DIM_OFFSET = 10
+TEXT_OFFSET = 3
 SLASH_PITCH = 3.0 # Spacing between slash lines in mm
+DIA_DIM_START = 15 # Distance of the first diameter dimension left of the RSV
+DIA_DIM_STEP = 10  # Extra distance for each further diameter dimension (at least the label width)
+
+CALLOUT_STEP = 7 # Distance between tiers of thread callouts (at least the label height)
+ARRANGE_STEP = 1.0 # Views are moved apart in steps of this size until their annotations clear
+
+# Function to place diameter dimensions (RSV-local coordinates: profile starts at x=0 on the axis y=0)
+def place_diameter_dim(layout, r, label):
+    """Places a diameter dimension on the first free tier left of the profile; returns the tier."""
+    text_kw = dict(ha='right', va='center', rotation=90, fontsize=10, fontweight='bold')
+    label_box = layout.text_box(0, 0, label, **text_kw)
+    step = max(DIA_DIM_STEP, label_box[2] - label_box[0] + TEXT_OFFSET + 2 * LINE_CLEARANCE)
+
+    def candidate(tier):
+        x_offset = -DIA_DIM_START - step * tier
+        boxes = [line_box(x_offset, -r, x_offset, r), layout.text_box(x_offset - TEXT_OFFSET, 0, label, **text_kw)]
+
+        def add():
+            layout.add_line('thin', [-PADDING, x_offset], [r, r])
+            layout.add_line('thin', [-PADDING, x_offset], [-r, -r])
+            layout.add_line('dimension', [x_offset, x_offset], [-r, r])
+            layout.add_text(x_offset - TEXT_OFFSET, 0, label, occupy=False, **text_kw)
+        return boxes, add
+    return layout.place(candidate, column='diameters')  # every diameter dimension crosses the axis
+
+
+def place_thread_callout(layout, z0, z1, y_top, label):
+    """Places a thread length callout on the first free tier above the profile; returns the tier."""
+    text_kw = dict(ha='center', va='bottom', fontsize=10, fontweight='bold')
+    label_box = layout.text_box(0, 0, label, **text_kw)
+    step = max(CALLOUT_STEP, label_box[3] - label_box[1] + TEXT_OFFSET + 2 * LINE_CLEARANCE)
+
+    def candidate(tier):
+        dim_y = y_top + DIM_OFFSET + step * tier
+        boxes = [line_box(z0, dim_y, z1, dim_y), layout.text_box((z0 + z1) / 2, dim_y + TEXT_OFFSET, label, **text_kw)]
+
+        def add():
+            layout.add_line('thin', [z0, z0], [y_top, dim_y])
+            layout.add_line('thin', [z1, z1], [y_top, dim_y])
+            layout.add_line('dimension', [z0, z1], [dim_y, dim_y])
+            layout.add_text((z0 + z1) / 2, dim_y + TEXT_OFFSET, label, occupy=False, **text_kw)
+        return boxes, add
+    return layout.place(candidate)
+
+
+def place_overall_length(layout, length, y_bottom, label):
+    """Places the overall length dimension on the first free tier below the profile; returns the tier."""
+    text_kw = dict(ha='center', va='top', fontsize=10, fontweight='bold')
+    label_box = layout.text_box(0, 0, label, **text_kw)
+    step = max(CALLOUT_STEP, label_box[3] - label_box[1] + TEXT_OFFSET + 2 * LINE_CLEARANCE)
+
+    def candidate(tier):
+        dim_y = y_bottom - DIM_OFFSET - step * tier
+        boxes = [line_box(0, dim_y, length, dim_y), layout.text_box(length / 2, dim_y - TEXT_OFFSET, label, **text_kw)]
+
+        def add():
+            layout.add_line('thin', [0, 0], [y_bottom, dim_y])
+            layout.add_line('thin', [length, length], [y_bottom, dim_y])
+            layout.add_line('dimension', [0, length], [dim_y, dim_y])
+            layout.add_text(length / 2, dim_y - TEXT_OFFSET, label, occupy=False, **text_kw)
+        return boxes, add
+    return layout.place(candidate)
+
+
+def place_length_label(layout, x_dim, y0, y1, label, column_width):
+    """Places a section length label next to its dimension line; returns the tier.
+
+    Tier 0 writes the label along the dimension line, inside the section, if
+    it fits there; further tiers write it horizontally in columns to the left.
+    """
+    y_mid = (y0 + y1) / 2
+    inside_kw = dict(ha='left', va='center', fontsize=10, rotation=-90)
+    outside_kw = dict(ha='right', va='center', fontsize=10)
+
+    def candidate(tier):
+        if tier == 0:
+            box = layout.text_box(x_dim + TEXT_OFFSET, y_mid, label, **inside_kw)
+            if box[1] < y0 or box[3] > y1:
+                return None
+            return [box], lambda: layout.add_text(x_dim + TEXT_OFFSET, y_mid, label, occupy=False, **inside_kw)
+        text_x = x_dim - TEXT_OFFSET * 2 - column_width * (tier - 1)
+
+        def add():
+            if tier > 1:  # leader back to the dimension line
+                layout.add_line('thin', [text_x + TEXT_OFFSET / 2, x_dim], [y_mid, y_mid])
+            layout.add_text(text_x, y_mid, label, occupy=False, **outside_kw)
+        return [layout.text_box(text_x, y_mid, label, **outside_kw)], add
+    return layout.place(candidate)
+
+
+def format_length(length):
+    """Formats a section length without a trailing '.0'."""
+    return f'{length:.1f}' if length != int(length) else f'{int(length)}'
+
+
+def default_text_units(table):
+    """Drawing units per text point when the sheet of this part fills a FIGSIZE figure."""
+    extent = table.max_diameter + SPACING + table.total_length + 6 * DIM_OFFSET
+    return text_scale(extent, extent, FIGSIZE)
+
+
+class SheetLayout:
+    """Annotation layouts and view anchors of one sheet, before any part geometry is drawn."""
+
+    def __init__(self, table, layouts, anchors, limits):
+        self.table = table
+        self.layouts = layouts  # view name -> dimension_layout.Layout in view-local coordinates
+        self.anchors = anchors  # view name -> (x, y) of the view origin on the sheet
+        self.limits = limits    # (x_min, x_max, y_min, y_max)
+
+
+def layout_sheet(sections_data, text_units=None):
+    """Lays out the annotations of the three views and arranges the views on the sheet.
+
+    sections_data rows are (length, major dia, minor dia, start z, threaded, thread label).
+    Each view collects its annotations in a dimension_layout.Layout (view-local
+    coordinates); the views are then moved apart until nothing collides.
+    text_units is the size of a text point in drawing units; by default it is
+    estimated for a FIGSIZE figure.
+    """
+    table = SectionTable(sections_data)
+    TOTAL_LENGTH = table.total_length
+    MAX_DIAMETER = table.max_diameter
+    MAX_RADIUS = MAX_DIAMETER / 2
+
+    scale = text_units or default_text_units(table)
+
+    # --- 1. New Front View (FV) - Circular End View (Left End) ---
+    with phase('dimensions:fv'):
+        fv = Layout(scale)
+        LEFT_END_D = sections_data[0][1]
+        fv.occupy((-MAX_RADIUS, -MAX_RADIUS, MAX_RADIUS, MAX_RADIUS))
+        fv.add_text(0, -MAX_RADIUS - 5, rf'FRONT VIEW ($\emptyset {LEFT_END_D:.2f}\mathrm{{ mm}}$)', ha='center', va='top')
+
+
+    # --- 2. New Right Side View (RSV) - Profile (Horizontal), profile from x=0 on the axis y=0 ---
+    with phase('dimensions:rsv'):
+        rsv = Layout(scale)
+        rsv.occupy((0, -MAX_RADIUS, TOTAL_LENGTH, MAX_RADIUS))
+        rsv.add_text(TOTAL_LENGTH / 2, -MAX_RADIUS - 5, 'RIGHT SIDE VIEW (Profile)', ha='center', va='top')
+
+        # Overall Length dimension (placed below the profile)
+        place_overall_length(rsv, TOTAL_LENGTH, -MAX_RADIUS, f'{round(TOTAL_LENGTH, 3):g}')
 
-# --- Function to draw slash lines for thread convention ---
-def draw_slash_lines(ax, start_z, length, radius, center_y, x_offset, orientation='horizontal'):
-    """Draws multiple slash lines across the threaded section."""
-    num_slashes = int(length / SLASH_PITCH)
-    
-    if orientation == 'horizontal':
-        # Diagonal lines
-        for i in range(num_slashes + 1):
-            z_pos = start_z + i * SLASH_PITCH
-            if z_pos > start_z + length:
-                z_pos = start_z + length
-            
-            x_pos = x_offset + z_pos
-            ax.plot([x_pos - r_major, x_pos + r_major], [center_y - r_major, center_y + r_major], 'k-', linewidth=0.5, alpha=0.7)
-
-
-# --- Setup Figure and Plot ---
-fig, ax = plt.subplots(figsize=(15, 10)) # Increased height for new dimensions
-ax.set_aspect('equal', adjustable='box')
-ax.set_title(r'Complete Dimensioned Drawing of Stepped Threaded Cylinder')
-
-# --- 1. New Front View (FV) - Circular End View (Left End) ---
-X_FV_CENTER = X0 + MAX_RADIUS
-Y_FV_CENTER = Y0 + MAX_RADIUS
-LEFT_END_D = sections_data[0][1] 
-
-all_diameters = sorted(list(set([s[1] for s in sections_data])), reverse=True)
-for D in all_diameters:
-    R = D / 2
-    style = {'linestyle': '-', 'linewidth': 1.5} if D == LEFT_END_D else {'linestyle': '--', 'linewidth': 1.0}
-    circ_fv = Circle((X_FV_CENTER, Y_FV_CENTER), R, fill=False, edgecolor='black', **style)
-    ax.add_patch(circ_fv)
-
-# Centerlines for FV (crosshairs)
-ax.plot([X_FV_CENTER - MAX_RADIUS, X_FV_CENTER + MAX_RADIUS], [Y_FV_CENTER, Y_FV_CENTER], 'k-.', linewidth=0.8)
-ax.plot([X_FV_CENTER, X_FV_CENTER], [Y_FV_CENTER - MAX_RADIUS, Y_FV_CENTER + MAX_RADIUS], 'k-.', linewidth=0.8)
-ax.text(X_FV_CENTER, Y0 - 5, 'FRONT VIEW ($\emptyset 8.40\mathrm{ mm}$)', ha='center', va='top')
-
-
-# --- 2. New Right Side View (RSV) - Profile (Horizontal) ---
-X_RSV_START = X0 + MAX_DIAMETER + SPACING
-Y_RSV_CENTER = Y_FV_CENTER
-Y_TOP_PROFILE = Y_RSV_CENTER + MAX_RADIUS
-Y_BOT_PROFILE = Y_RSV_CENTER - MAX_RADIUS
-
-# Centerline for RSV
-ax.plot([X_RSV_START, X_RSV_START + TOTAL_LENGTH], [Y_RSV_CENTER, Y_RSV_CENTER], 'k-.', linewidth=0.8)
-ax.text(X_RSV_START + TOTAL_LENGTH / 2, Y0 - 5, 'RIGHT SIDE VIEW (Profile)', ha='center', va='top')
-
-# --- Diameter Dimensioning on the Left of RSV ---
-X_DIM_OFFSET_1 = X_RSV_START - 15  # Ø10.05
-X_DIM_OFFSET_2 = X_RSV_START - 25  # Ø8.40
-X_DIM_OFFSET_3 = X_RSV_START - 35  # Ø8.00
-
-# Function to place diameter dimensions
-def place_diameter_dim(ax, r, x_offset, label):
-    y_top = Y_RSV_CENTER + r
-    y_bot = Y_RSV_CENTER - r
-    ax.plot([X_RSV_START - PADDING, x_offset], [y_top, y_top], 'k-', linewidth=0.5) 
-    ax.plot([X_RSV_START - PADDING, x_offset], [y_bot, y_bot], 'k-', linewidth=0.5) 
-    ax.plot([x_offset, x_offset], [y_bot, y_top], 'k-', linewidth=0.8) 
-    ax.text(x_offset - TEXT_OFFSET, Y_RSV_CENTER, label, ha='right', va='center', rotation=90, fontsize=10, fontweight='bold')
-
-place_diameter_dim(ax, 10.05/2, X_DIM_OFFSET_1, r'$\emptyset 10.05$')
-place_diameter_dim(ax, 8.40/2, X_DIM_OFFSET_2, r'$\emptyset 8.40$')
-place_diameter_dim(ax, 8.00/2, X_DIM_OFFSET_3, r'$\emptyset 8.00$')
-
-
-# --- Draw profile segments, thread callouts, and overall length (RSV) ---
-for i, data in enumerate(sections_data):
-    length, d_major, d_minor, start_z, is_threaded, thread_label = data
-    r_major = d_major / 2
-    end_z = start_z + length
-    
-    X_start = X_RSV_START + start_z
-    X_end = X_RSV_START + end_z
-
-    # Major Diameter (Profile Outline)
-    ax.plot([X_start, X_end], [Y_RSV_CENTER + r_major, Y_RSV_CENTER + r_major], 'k-', linewidth=1.5)
-    ax.plot([X_start, X_end], [Y_RSV_CENTER - r_major, Y_RSV_CENTER - r_major], 'k-', linewidth=1.5)
-    if i > 0:
-        prev_r_major = sections_data[i-1][1] / 2
-        ax.plot([X_start, X_start], [Y_RSV_CENTER - prev_r_major, Y_RSV_CENTER - r_major], 'k-', linewidth=1.5)
-        ax.plot([X_start, X_start], [Y_RSV_CENTER + prev_r_major, Y_RSV_CENTER + r_major], 'k-', linewidth=1.5)
-
-    # Thread Convention
-    if is_threaded:
-        # Draw multiple slash lines
-        draw_slash_lines(ax, start_z, length, r_major, Y_RSV_CENTER, X_RSV_START, orientation='horizontal')
-        # Thread Termination
-        termination_z = end_z - length * 0.1 
-        X_term = X_RSV_START + termination_z
-        ax.plot([X_term, X_term], [Y_RSV_CENTER - r_major, Y_RSV_CENTER + r_major], 'k-', linewidth=0.5)
-
-        # Thread Callout (Above profile)
+        # --- Diameter Dimensioning on the Left of RSV ---
+        # One dimension per plain (unthreaded) diameter, largest closest to the profile
+        for d in sorted(set(s[1] for s in sections_data if not s[4]), reverse=True):
+            place_diameter_dim(rsv, d / 2, rf'$\emptyset {d:.2f}$')
+
+        # Thread Callouts (Above profile)
         # Note: We reuse this space for thread info, which includes the length (MxxLx7.5)
-        dim_y = Y_TOP_PROFILE + DIM_OFFSET * (1 + i/4) 
-        ax.plot([X_start, X_start], [Y_TOP_PROFILE, dim_y], 'k-', linewidth=0.5)
-        ax.plot([X_end, X_end], [Y_TOP_PROFILE, dim_y], 'k-', linewidth=0.5)
-        ax.plot([X_start, X_end], [dim_y, dim_y], 'k-', linewidth=0.8)
-        ax.text(X_start + length / 2, dim_y + TEXT_OFFSET, thread_label + f' L={length}', ha='center', va='bottom', fontsize=10, fontweight='bold')
-        
-    # Overall Length dimension (placed below the profile - only on last iteration)
-    if i == len(sections_data) - 1:
-        dim_y_total = Y_RSV_CENTER - MAX_RADIUS - DIM_OFFSET 
-        ax.plot([X_RSV_START, X_RSV_START], [Y_RSV_CENTER - MAX_RADIUS, dim_y_total], 'k-', linewidth=0.5)
-        ax.plot([X_RSV_START + TOTAL_LENGTH, X_RSV_START + TOTAL_LENGTH], [Y_RSV_CENTER - MAX_RADIUS, dim_y_total], 'k-', linewidth=0.5)
-        ax.plot([X_RSV_START, X_RSV_START + TOTAL_LENGTH], [dim_y_total, dim_y_total], 'k-', linewidth=0.8)
-        ax.text(X_RSV_START + TOTAL_LENGTH / 2, dim_y_total - TEXT_OFFSET, f'{TOTAL_LENGTH}', ha='center', va='top', fontsize=10, fontweight='bold')
-
-
-# End caps
-ax.plot([X_RSV_START, X_RSV_START], [Y_RSV_CENTER - sections_data[0][1]/2, Y_RSV_CENTER + sections_data[0][1]/2], 'k-', linewidth=1.5)
-ax.plot([X_RSV_START + TOTAL_LENGTH, X_RSV_START + TOTAL_LENGTH], [Y_RSV_CENTER - sections_data[-1][1]/2, Y_RSV_CENTER + sections_data[-1][1]/2], 'k-', linewidth=1.5)
-
-
-# --- 3. New Top View (TV) - Profile (Vertical) ---
-X_TV_CENTER = X_FV_CENTER
-Y_TV_START = Y0 + MAX_DIAMETER + SPACING + DIM_OFFSET * 2 
-X_TV_LEFT = X_TV_CENTER - MAX_RADIUS
-
-# Centerline for TV
-ax.plot([X_TV_CENTER, X_TV_CENTER], [Y_TV_START, Y_TV_START + TOTAL_LENGTH], 'k-.', linewidth=0.8)
-ax.text(X_TV_CENTER, Y_TV_START + TOTAL_LENGTH + 5, 'TOP VIEW (Profile)', ha='center', va='bottom')
-
-# --- NEW: Sectional Length Dimensioning on the Left of TV ---
-X_DIM_LENGTH_SECT = X_TV_CENTER - MAX_RADIUS - 10
-
-# Iterating to place sectional dimensions
-for i, data in enumerate(sections_data):
-    length, d_major, d_minor, start_z, is_threaded, thread_label = data
-    Y_start = Y_TV_START + start_z
-    Y_end = Y_TV_START + start_z + length
-    
-    # Major Diameter (Profile Outline)
-    r_major = d_major / 2
-    ax.plot([X_TV_CENTER + r_major, X_TV_CENTER + r_major], [Y_start, Y_end], 'k-', linewidth=1.5)
-    ax.plot([X_TV_CENTER - r_major, X_TV_CENTER - r_major], [Y_start, Y_end], 'k-', linewidth=1.5)
-
-    # Step Edges (Horizontal Lines)
-    if i > 0:
-        prev_r_major = sections_data[i-1][1] / 2
-        ax.plot([X_TV_CENTER - prev_r_major, X_TV_CENTER - r_major], [Y_start, Y_start], 'k-', linewidth=1.5)
-        ax.plot([X_TV_CENTER + prev_r_major, X_TV_CENTER + r_major], [Y_start, Y_start], 'k-', linewidth=1.5)
-    
-    # Thread Convention
-    if is_threaded:
-        # Draw multiple slash lines (horizontal for vertical view)
-        num_slashes = int(length / SLASH_PITCH)
-        for j in range(num_slashes + 1):
-            y_pos = Y_TV_START + start_z + j * SLASH_PITCH
-            if y_pos > Y_TV_START + end_z:
-                y_pos = Y_TV_START + end_z
-                
-            ax.plot([X_TV_CENTER - r_major, X_TV_CENTER + r_major], 
-                    [y_pos, y_pos], 
-                    'k-', linewidth=0.5, alpha=0.7)
-
-        # Thread Termination 
-        termination_z = end_z - length * 0.1 
-        Y_term = Y_TV_START + termination_z
-        ax.plot([X_TV_CENTER - r_major, X_TV_CENTER + r_major], [Y_term, Y_term], 'k-', linewidth=0.5)
-
-    
-    # --- ADD SECTIONAL LENGTH DIMENSIONS HERE (Left of TV) ---
-    # Extension lines
-    ax.plot([X_TV_LEFT, X_DIM_LENGTH_SECT], [Y_start, Y_start], 'k-', linewidth=0.5)
-    ax.plot([X_TV_LEFT, X_DIM_LENGTH_SECT], [Y_end, Y_end], 'k-', linewidth=0.5)
-
-    # Dimension line
-    ax.plot([X_DIM_LENGTH_SECT, X_DIM_LENGTH_SECT], [Y_start, Y_end], 'k-', linewidth=0.8)
-    
-    # Dimension text
-    text_label = f'{length:.1f}' if length != int(length) else f'{int(length)}'
-
-    if length < 5: 
-        text_x = X_DIM_LENGTH_SECT - TEXT_OFFSET * 2
-        text_y = Y_start + length / 2
-        ax.text(text_x, text_y, text_label, ha='right', va='center', fontsize=10)
-    else:
-        ax.text(X_DIM_LENGTH_SECT + TEXT_OFFSET, Y_start + length / 2, text_label, ha='left', va='center', fontsize=10, rotation=-90)
-
-# End caps (Horizontal lines at start/end of the part)
-ax.plot([X_TV_CENTER - sections_data[0][1]/2, X_TV_CENTER + sections_data[0][1]/2], [Y_TV_START, Y_TV_START], 'k-', linewidth=1.5)
-ax.plot([X_TV_CENTER - sections_data[-1][1]/2, X_TV_CENTER + sections_data[-1][1]/2], [Y_TV_START + TOTAL_LENGTH, Y_TV_START + TOTAL_LENGTH], 'k-', linewidth=1.5)
+        # Threaded rows without a label (optional in the spec files) get the nominal size
+        for i in np.flatnonzero(table.threaded):
+            label = table.labels[i] or f'M{table.d_major[i]:g}'
+            place_thread_callout(rsv, table.start_z[i], table.end_z[i], MAX_RADIUS, f'{label} L={format_length(table.length[i])}')
+
+
+    # --- 3. New Top View (TV) - Profile (Vertical), axis at x=0 from y=0 ---
+    with phase('dimensions:tv'):
+        tv = Layout(scale)
+        tv.occupy((-MAX_RADIUS, 0, MAX_RADIUS, TOTAL_LENGTH))
+        tv.add_text(0, TOTAL_LENGTH + 5, 'TOP VIEW (Profile)', ha='center', va='bottom')
+
+        # --- NEW: Sectional Length Dimensioning on the Left of TV ---
+        X_DIM_LENGTH_SECT = -MAX_RADIUS - 10
+        Y_start = table.start_z
+        Y_end = table.end_z
+
+        # Extension lines
+        tv.add_segments('thin', segments(-MAX_RADIUS, Y_start, X_DIM_LENGTH_SECT, Y_start))
+        tv.add_segments('thin', segments(-MAX_RADIUS, Y_end, X_DIM_LENGTH_SECT, Y_end))
+
+        # Dimension lines
+        tv.add_segments('dimension', segments(X_DIM_LENGTH_SECT, Y_start, X_DIM_LENGTH_SECT, Y_end))
+        tv.occupy(line_box(X_DIM_LENGTH_SECT, 0, X_DIM_LENGTH_SECT, TOTAL_LENGTH))
 
+        # Dimension text, along the line where it fits, else outside in columns
+        labels = [format_length(length) for length in table.length]
+        column_width = max(text_size(label, 10, scale)[0] for label in labels) + TEXT_OFFSET
+        for label, y_start, y_end in zip(labels, Y_start, Y_end):
+            place_length_label(tv, X_DIM_LENGTH_SECT, y_start, y_end, label, column_width)
 
-# --- Set Limits and clean up plot ---
-X_MIN = X_RSV_START - 45 
-X_MAX = X_RSV_START + TOTAL_LENGTH + PADDING + 5
-Y_MAX = Y_TV_START + TOTAL_LENGTH + PADDING + 15
-Y_MIN = Y_RSV_CENTER - MAX_RADIUS - DIM_OFFSET * 2
-
-ax.set_xlim(X_MIN, X_MAX)
-ax.set_ylim(Y_MIN, Y_MAX)
-ax.axis('off')
-
-# --- Save to PNG ---
-output_filename = 'stepped_threaded_cylinder_final_dim_complete.png'
-plt.savefig(output_filename, bbox_inches='tight')
-
-print(f"Drawing saved as {output_filename}")
\ No newline at end of file
+
+    # --- Arrange the views: FV fixed, RSV to its right, TV above it ---
+    with phase('layout'):
+        X_FV_CENTER = X0 + MAX_RADIUS
+        Y_FV_CENTER = Y0 + MAX_RADIUS
+        sheet = GridIndex(fv.index.cell)
+        fv.copy_to(sheet, X_FV_CENTER, Y_FV_CENTER)
+        X_RSV_START, Y_RSV_CENTER = arrange(rsv, sheet, X0 + MAX_DIAMETER + SPACING, Y_FV_CENTER, dx=1, step=ARRANGE_STEP)
+        X_TV_CENTER, Y_TV_START = arrange(tv, sheet, X_FV_CENTER, Y0 + MAX_DIAMETER + SPACING + DIM_OFFSET * 2, dy=1, step=ARRANGE_STEP)
+
+        # --- Set Limits ---
+        boxes = np.array(sheet.boxes)
+        X_MIN = boxes[:, 0].min() - PADDING
+        Y_MIN = boxes[:, 1].min() - PADDING
+        X_MAX = boxes[:, 2].max() + PADDING
+        Y_MAX = boxes[:, 3].max() + PADDING
+
+    return SheetLayout(table, {'fv': fv, 'rsv': rsv, 'tv': tv},
+                       {'fv': (X_FV_CENTER, Y_FV_CENTER), 'rsv': (X_RSV_START, Y_RSV_CENTER), 'tv': (X_TV_CENTER, Y_TV_START)},
+                       (X_MIN, X_MAX, Y_MIN, Y_MAX))
+
+
+# --- View geometry, each in its own local coordinates (origin at the view anchor) ---
+def end_view_drawing(table):
+    """FRONT VIEW: one circle per diameter, the left end visible and the others hidden, with crosshairs."""
+    drawing = Drawing()
+    max_radius = table.max_diameter / 2
+    for D in sorted(set(table.d_major.tolist()), reverse=True):
+        drawing.add_circle(0, 0, D / 2, 'outline' if D == table.d_major[0] else 'hidden')
+    drawing.add_line('centerline', [-max_radius, max_radius], [0, 0])
+    drawing.add_line('centerline', [0, 0], [-max_radius, max_radius])
+    return drawing
+
+
+def profile_drawing(table, view, slant):
+    """Profile, thread convention and termination lines and the axis of a profile view."""
+    drawing = Drawing()
+    drawing.add_segments('outline', project(outline_segments(table), view))
+    drawing.add_segments('thread', project(slash_segments(table, SLASH_PITCH, slant=slant), view))
+    drawing.add_segments('thin', project(termination_segments(table), view))
+    drawing.add_segments('centerline', project([[[0, 0], [table.total_length, 0]]], view))
+    return drawing
+
+
+def horizontal_profile_drawing(table):
+    """RIGHT SIDE VIEW: the profile along +x with diagonal thread slashes."""
+    return profile_drawing(table, horizontal_view(0, 0), slant=1.0)
+
+
+def vertical_profile_drawing(table):
+    """TOP VIEW: the profile along +y with thread lines across the axis."""
+    return profile_drawing(table, vertical_view(0, 0), slant=0.0)
+
+
+VIEW_DRAWINGS = {'fv': end_view_drawing, 'rsv': horizontal_profile_drawing, 'tv': vertical_profile_drawing}
+
+
+def dimension_drawing(sheet):
+    """The dimension layer: every view's annotations, placed on the sheet."""
+    drawing = Drawing()
+    for view, layout in sheet.layouts.items():
+        layout.emit(drawing, *sheet.anchors[view])
+    return drawing
+
+
+def build_stepped_drawing(sections_data, text_units=None, detail='final'):
+    """Builds the dimensioned three-view Drawing of a stepped cylinder (see layout_sheet).
+
+    detail is a drafting.DETAIL_LEVELS level; a draft is the final drawing
+    with the threads, hidden lines and annotations left out.
+    """
+    sheet = layout_sheet(sections_data, text_units)
+    with phase('dimensions:emit'):
+        drawing = dimension_drawing(sheet)
+    drawing.title = r'Complete Dimensioned Drawing of Stepped Threaded Cylinder'
+    for view, build in VIEW_DRAWINGS.items():
+        with phase(f'view:{view}'):
+            drawing.add_drawing(build(sheet.table), offset=sheet.anchors[view])
+    drawing.limits = sheet.limits
+    return drawing.at_detail(detail)
+
+
+def draw_stepped_cylinder(ax, sections_data, detail='final'):
+    """Draws the stepped cylinder drawing on ax; returns the artists created."""
+    return build_stepped_drawing(sections_data, detail=detail).draw(ax)
+
+
+def render_style(detail='final'):
+    """Style settings that change the rendered output (part of the render cache key)."""
+    return {'lines': drafting.STYLES, 'figsize': FIGSIZE, 'detail': DETAIL_LEVELS[detail]}
+
+
+def render(output_filename, sections_data=sections_data, dpi=None, detail='final'):
+    """Draws the stepped cylinder drawing and saves it to output_filename (dpi defaults by detail level)."""
+    with phase('import'):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+    # --- Setup Figure and Plot (no pyplot, so this also runs on a background thread) ---
+    with phase('setup'):
+        fig = Figure(figsize=FIGSIZE)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+    draw_stepped_cylinder(ax, sections_data, detail)
+
+    # --- Save to PNG ---
+    with phase('save', detail=detail):
+        fig.savefig(output_filename, bbox_inches='tight', dpi=DETAIL_LEVELS[detail]['dpi'] if dpi is None else dpi)
+    profiling.count_written(output_filename)
+
+
+def render_progressive(output_filename, sections_data=sections_data, dpi=None, background=True, sources=()):
+    """Writes a draft to output_filename at once, then replaces it with the final drawing.
+
+    The final pass goes through the render cache and runs on a thread when
+    background is true. Returns a function that waits for it (background)
+    or runs it (on demand).
+    """
+    with phase('draft'):
+        render(output_filename, sections_data, detail='draft')
+
+    def final():
+        root, ext = os.path.splitext(output_filename)
+        partial = f'{root}.partial{ext}'
+        try:
+            with phase('final'):
+                cached_render(partial, sections_data, lambda path: render(path, sections_data, dpi), dpi=dpi,
+                              style=render_style(), sources=sources)
+            os.replace(partial, output_filename)  # viewers never see a half-written file
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+    if not background:
+        return final
+    thread = threading.Thread(target=final, name='final-drawing')
+    thread.start()
+    return thread.join
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Dimensioned three-view drawing of the stepped cylinder.')
+    parser.add_argument('scad', nargs='?', help='draw the sections of a .scad model instead of the table above')
+    parser.add_argument('--detail', choices=list(DETAIL_LEVELS), default='final')
+    parser.add_argument('--progressive', action='store_true', help='write a draft first, then the final drawing')
+    args = parser.parse_args()
+
+    output_filename = 'stepped_threaded_cylinder_final_dim_complete.png'
+    if args.scad:
+        from scad_sections import extract_sections
+
+        sections_data = extract_sections(args.scad)
+        output_filename = os.path.splitext(os.path.basename(args.scad))[0] + '.png'
+    sources = [__file__, dimension_layout.__file__, drafting.__file__, stepped_geometry.__file__]
+    t0 = time.perf_counter()
+    if args.progressive:
+        finish = render_progressive(output_filename, sections_data, sources=sources)
+        print(f"Draft saved as {output_filename} ({(time.perf_counter() - t0) * 1000:.0f} ms)")
+        finish()
+        print(f"Drawing saved as {output_filename} ({(time.perf_counter() - t0) * 1000:.0f} ms)")
+    elif cached_render(output_filename, sections_data, lambda path: render(path, sections_data, detail=args.detail),
+                       dpi=DETAIL_LEVELS[args.detail]['dpi'], style=render_style(args.detail), sources=sources):
+        print(f"Drawing {output_filename} is up to date (cached)")
+    else:
+        print(f"Drawing saved as {output_filename}")
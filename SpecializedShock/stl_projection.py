@@ -0,0 +1,373 @@
+"""Orthographic three-view drawings of arbitrary STL meshes, with hidden lines.
+
+For parts that are not bodies of revolution (shock_handle.scad,
+simple_handle.scad, the chord and fillet cuts) the geometry comes from an
+STL exported from the SCAD model (see scad_build.py) instead of a section
+table. For each view direction:
+
+    1. Candidate edges are the mesh edges worth drawing: silhouettes (one
+       adjacent face turned towards the viewer, the other away), creases
+       (dihedral angle above crease_angle) and open boundaries.
+       Tessellation edges of smooth surfaces are dropped.
+    2. Every candidate edge is cut into pieces no longer than tolerance and
+       each piece midpoint is tested for occlusion: is it inside the
+       projection of a triangle that lies in front of it? The projected
+       triangles are binned in a uniform grid (TriangleGrid), so a point is
+       only tested against the triangles of its cell; the (point, triangle)
+       pairs are processed as arrays, in chunks.
+    3. Consecutive pieces with the same class are merged into visible and
+       hidden segments; hidden pieces lying under a visible line are dropped.
+
+The views are laid out like the other three-view scripts (third angle: TOP
+VIEW above the FRONT VIEW, RIGHT SIDE VIEW to its right, sharing their
+axes) and written through drafting.Drawing, so PNG, SVG and DXF all work.
+
+Views (model axes as in OpenSCAD, z up):
+    front   looking along +y: x to the right, z up
+    top     looking along -z: x to the right, y up
+    right   looking along -x: y to the right, z up
+
+Usage:
+    python stl_projection.py shock_handle.stl -o shock_handle_three_view.png
+    python stl_projection.py part.stl -o part.svg --crease 20 --no-hidden
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from dimension_layout import GridIndex, Layout, arrange, cell_size, text_scale
+from drafting import Drawing
+
+DEFAULT_CREASE = 30.0   # degrees between face normals for a feature edge
+WELD_FRACTION = 1e-6     # vertex weld distance as a fraction of the model diagonal
+TOLERANCE_FRACTION = 1e-3  # default piece length as a fraction of the model diagonal
+CHUNK_PAIRS = 2_000_000  # (point, triangle) pairs tested per array operation
+CELLS_PER_TRIANGLE = 1.0  # target grid cells per projected triangle (caps the grid size)
+FIGSIZE = (15, 10)
+SPACING = 15
+PADDING = 5
+ARRANGE_STEP = 1.0
+
+# name -> (right, up, towards the viewer) unit vectors in model coordinates
+VIEWS = {
+    'front': ((1.0, 0.0, 0.0), (0.0, 0.0, 1.0), (0.0, -1.0, 0.0)),
+    'top':   ((1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0)),
+    'right': ((0.0, 1.0, 0.0), (0.0, 0.0, 1.0), (1.0, 0.0, 0.0)),
+}
+VIEW_TITLES = {'front': 'FRONT VIEW', 'top': 'TOP VIEW', 'right': 'RIGHT SIDE VIEW'}
+
+
+# --- Mesh ---
+def read_stl(path):
+    """Reads a binary or ASCII STL file; returns triangles as an (F, 3, 3) array."""
+    from thread_mesh import STL_TRIANGLE
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) >= 84:
+        count = int(np.frombuffer(data, '<u4', 1, 80)[0])
+        if len(data) == 84 + count * STL_TRIANGLE.itemsize:
+            return np.frombuffer(data, STL_TRIANGLE, count, 84)['vertices'].astype(float)
+    # ASCII: every 'vertex x y z' line, three per facet
+    words = data.decode('ascii', errors='replace').split()
+    idx = [i for i, w in enumerate(words) if w == 'vertex']
+    coords = np.array([words[i + 1:i + 4] for i in idx], dtype=float)
+    if not len(coords) or len(coords) % 3:
+        raise ValueError(f'{path} is not a valid STL file')
+    return coords.reshape(-1, 3, 3)
+
+
+class Mesh:
+    """Welded triangle mesh with its edge-face adjacency."""
+
+    def __init__(self, triangles, weld=None):
+        triangles = np.asarray(triangles, dtype=float).reshape(-1, 3, 3)
+        points = triangles.reshape(-1, 3)
+        self.size = float(np.linalg.norm(points.max(axis=0) - points.min(axis=0)))
+        # Vertices within weld of each other become one; quantized coordinates pack into one int64 key
+        weld = max(self.size * WELD_FRACTION if weld is None else weld, 1e-12)
+        q = np.round((points - points.min(axis=0)) / weld).astype(np.int64)
+        span = q.max(axis=0) + 1
+        _, first, inverse = np.unique((q[:, 0] * span[1] + q[:, 1]) * span[2] + q[:, 2],
+                                      return_index=True, return_inverse=True)
+        self.vertices = points[first]
+        faces = inverse.reshape(-1, 3)
+        # Drop triangles that collapsed when welding
+        keep = (faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 2] != faces[:, 0])
+        self.faces = faces[keep]
+
+        tri = self.vertices[self.faces]
+        normals = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        self.normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+        # Edges as sorted vertex pairs; the first two faces of each edge are kept
+        n = len(self.faces)
+        half = np.concatenate([self.faces[:, [0, 1]], self.faces[:, [1, 2]], self.faces[:, [2, 0]]])
+        half_face = np.tile(np.arange(n), 3)
+        half = np.sort(half, axis=1)
+        key = half[:, 0] * len(self.vertices) + half[:, 1]
+        order = np.argsort(key, kind='stable')
+        key, half, half_face = key[order], half[order], half_face[order]
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+        counts = np.diff(np.r_[starts, len(key)])
+        second = np.where(counts > 1, half_face[np.minimum(starts + 1, len(key) - 1)], -1)  # -1: open boundary
+        self.edges = half[starts]
+        self.edge_faces = np.stack([half_face[starts], second], axis=1)
+
+    def __len__(self):
+        return len(self.faces)
+
+    @property
+    def bounds(self):
+        return self.vertices.min(axis=0), self.vertices.max(axis=0)
+
+
+def candidate_edges(mesh, towards, crease_angle=DEFAULT_CREASE):
+    """Indices of the silhouette, crease and boundary edges for a view direction."""
+    f0, f1 = mesh.edge_faces[:, 0], mesh.edge_faces[:, 1]
+    boundary = f1 < 0
+    f1 = np.where(boundary, f0, f1)
+    facing = mesh.normals @ np.asarray(towards) > 0
+    silhouette = facing[f0] != facing[f1]
+    crease = np.einsum('ij,ij->i', mesh.normals[f0], mesh.normals[f1]) < np.cos(np.radians(crease_angle))
+    return np.flatnonzero(silhouette | crease | boundary)
+
+
+# --- Occlusion ---
+class TriangleGrid:
+    """Projected triangles binned in a uniform 2D grid, with their depth planes."""
+
+    def __init__(self, points, depth, min_area=1e-12):
+        """points: (F, 3, 2) projected corners; depth: (F, 3) distance towards the viewer."""
+        a, b, c = points[:, 0], points[:, 1], points[:, 2]
+        det = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+        keep = np.abs(det) > min_area  # faces seen edge-on hide nothing
+        a, b, c, det, depth = a[keep], b[keep], c[keep], det[keep], depth[keep]
+        self.a = a
+        # Rows of the inverse of [b - a, c - a]: barycentric (l1, l2) = inv @ (p - a)
+        self.inv = np.stack([np.stack([c[:, 1] - a[:, 1], a[:, 0] - c[:, 0]], axis=-1),
+                             np.stack([a[:, 1] - b[:, 1], b[:, 0] - a[:, 0]], axis=-1)], axis=1) / det[:, None, None]
+        self.depth = depth
+
+        lo = np.minimum(np.minimum(a, b), c)
+        hi = np.maximum(np.maximum(a, b), c)
+        self.origin = lo.min(axis=0) if len(a) else np.zeros(2)
+        extent = (hi.max(axis=0) - self.origin) if len(a) else np.ones(2)
+        # Cells about the size of a typical triangle, but no more than CELLS_PER_TRIANGLE * F cells
+        typical = np.median(hi - lo, axis=0).max() if len(a) else 1.0
+        budget = max(len(a) * CELLS_PER_TRIANGLE, 1.0)
+        self.cell = max(typical, np.sqrt(extent[0] * extent[1] / budget), 1e-9)
+        self.shape = np.maximum(np.ceil(extent / self.cell).astype(int), 1)
+
+        i0, j0 = self._cell(lo).T
+        i1, j1 = self._cell(hi).T
+        nx, ny = i1 - i0 + 1, j1 - j0 + 1
+        counts = nx * ny
+        tri = np.repeat(np.arange(len(a)), counts)
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cells = (np.repeat(i0, counts) + k // np.repeat(ny, counts)) * self.shape[1] + np.repeat(j0, counts) + k % np.repeat(ny, counts)
+        order = np.argsort(cells, kind='stable')
+        self.tri = tri[order]
+        self.cell_start = np.searchsorted(cells[order], np.arange(self.shape[0] * self.shape[1] + 1))
+
+    def _cell(self, p):
+        return np.clip(np.floor((p - self.origin) / self.cell).astype(int), 0, self.shape - 1)
+
+    def occluded(self, points, depth, eps):
+        """True for each point covered by a triangle more than eps in front of it."""
+        result = np.zeros(len(points), dtype=bool)
+        inside = np.all((points >= self.origin) & (points <= self.origin + self.shape * self.cell), axis=1)
+        idx = np.flatnonzero(inside)
+        i, j = self._cell(points[idx]).T
+        cell = i * self.shape[1] + j
+        start, count = self.cell_start[cell], self.cell_start[cell + 1] - self.cell_start[cell]
+
+        # Chunks of points whose candidate pairs fit in CHUNK_PAIRS
+        ends = np.cumsum(count)
+        lo = 0
+        while lo < len(idx):
+            hi = max(int(np.searchsorted(ends, ends[lo] - count[lo] + CHUNK_PAIRS, side='right')), lo + 1)
+            c, s = count[lo:hi], start[lo:hi]
+            pt = np.repeat(np.arange(lo, hi), c)
+            t = self.tri[np.repeat(s, c) + np.arange(c.sum()) - np.repeat(np.cumsum(c) - c, c)]
+            r = points[idx[pt]] - self.a[t]
+            l1 = self.inv[t, 0, 0] * r[:, 0] + self.inv[t, 0, 1] * r[:, 1]
+            l2 = self.inv[t, 1, 0] * r[:, 0] + self.inv[t, 1, 1] * r[:, 1]
+            covered = (l1 >= 0) & (l2 >= 0) & (l1 + l2 <= 1)
+            d = self.depth[t]
+            front = d[:, 0] + l1 * (d[:, 1] - d[:, 0]) + l2 * (d[:, 2] - d[:, 0]) > depth[idx[pt]] + eps
+            result[idx[pt[covered & front]]] = True
+            lo = hi
+        return result
+
+
+# --- Projection ---
+def piece_keys(points, direction, size):
+    """Integer key of the size x size cell each piece midpoint falls in and its direction (one of 16)."""
+    ij = np.floor(points / size).astype(np.int64)
+    angle = np.round(np.arctan2(direction[:, 1], direction[:, 0]) % np.pi / (np.pi / 16)).astype(np.int64) % 16
+    return (((ij[:, 0] << 28) ^ (ij[:, 1] & 0xFFFFFFF)) << 4) | angle
+
+
+def merge_pieces(p0, p1, edge, k, n, selected):
+    """Joins consecutive selected pieces of each edge into (N, 2, 2) segments."""
+    idx = np.flatnonzero(selected)
+    if not len(idx):
+        return np.empty((0, 2, 2))
+    # A run ends where the edge changes or a piece is left out
+    new_run = np.r_[True, (edge[idx[1:]] != edge[idx[:-1]]) | (idx[1:] != idx[:-1] + 1)]
+    start, end = idx[new_run], idx[np.r_[new_run[1:], True]]
+    e = edge[start]
+    t0, t1 = k[start] / n[e], (k[end] + 1) / n[e]
+    d = (p1 - p0)[e]
+    return np.stack([p0[e] + t0[:, None] * d, p0[e] + t1[:, None] * d], axis=1)
+
+
+def project_view(mesh, view, tolerance=None, crease_angle=DEFAULT_CREASE, hidden=True):
+    """Visible and hidden (N, 2, 2) segments of a mesh seen from a VIEWS entry.
+
+    tolerance is the longest piece an edge is classified in (default: a
+    thousandth of the model diagonal).
+    """
+    right, up, towards = (np.asarray(v) for v in VIEWS[view])
+    tolerance = mesh.size * TOLERANCE_FRACTION if tolerance is None else tolerance
+    uv = np.stack([mesh.vertices @ right, mesh.vertices @ up], axis=-1)
+    w = mesh.vertices @ towards
+
+    edges = mesh.edges[candidate_edges(mesh, towards, crease_angle)]
+    p0, p1 = uv[edges[:, 0]], uv[edges[:, 1]]
+    length = np.linalg.norm(p1 - p0, axis=1)
+    keep = length > tolerance * 1e-3  # edges along the view direction project to points
+    edges, p0, p1, length = edges[keep], p0[keep], p1[keep], length[keep]
+    w0, w1 = w[edges[:, 0]], w[edges[:, 1]]
+
+    # Pieces of at most tolerance along each edge, classified at their midpoints
+    n = np.maximum(np.ceil(length / tolerance).astype(int), 1)
+    edge = np.repeat(np.arange(len(edges)), n)
+    k = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+    t = (k + 0.5) / n[edge]
+    mid = p0[edge] + t[:, None] * (p1 - p0)[edge]
+    depth = w0[edge] + t * (w1 - w0)[edge]
+    grid = TriangleGrid(uv[mesh.faces], w[mesh.faces])
+    is_hidden = grid.occluded(mid, depth, eps=tolerance * 1e-2)
+    visible = merge_pieces(p0, p1, edge, k, n, ~is_hidden)
+    if not hidden:
+        return visible, np.empty((0, 2, 2))
+
+    # Hidden pieces lying along a visible line, or along another hidden piece, are not drawn
+    direction = (p1 - p0)[edge]
+    keys = piece_keys(mid, direction, tolerance)
+    shown = is_hidden & ~np.isin(keys, keys[~is_hidden])
+    idx = np.flatnonzero(shown)
+    _, first = np.unique(piece_keys(mid[idx], direction[idx], tolerance * 1e-3), return_index=True)
+    shown[idx] = False
+    shown[idx[first]] = True
+    return visible, merge_pieces(p0, p1, edge, k, n, shown)
+
+
+# --- Sheet ---
+def build_projection_drawing(mesh, views=('front', 'top', 'right'), tolerance=None, crease_angle=DEFAULT_CREASE,
+                             hidden=True, title=None, text_units=None):
+    """Three-view Drawing of a mesh: TOP VIEW above the FRONT VIEW, RIGHT SIDE VIEW to its right.
+
+    Returns (drawing, seconds per view).
+    """
+    timings = {}
+    projected = {}
+    for view in views:
+        t = time.perf_counter()
+        projected[view] = project_view(mesh, view, tolerance, crease_angle, hidden)
+        timings[view] = time.perf_counter() - t
+
+    boxes = {}
+    for view, (visible, hidden_segs) in projected.items():
+        points = np.concatenate([visible.reshape(-1, 2), hidden_segs.reshape(-1, 2)])
+        if not len(points):
+            points = np.zeros((1, 2))
+        (x0, y0), (x1, y1) = points.min(axis=0), points.max(axis=0)
+        boxes[view] = (x0, y0, x1, y1)
+    width = sum(b[2] - b[0] for b in boxes.values()) + SPACING * len(boxes)
+    scale = text_units or text_scale(width, width, FIGSIZE)
+
+    # Each view: its geometry box and title in its own projection coordinates
+    layouts = {}
+    for view, (x0, y0, x1, y1) in boxes.items():
+        layout = Layout(scale)
+        layout.occupy((x0, y0, x1, y1))
+        layout.add_text((x0 + x1) / 2, y0 - 5, VIEW_TITLES.get(view, view.upper()), ha='center', va='top')
+        layouts[view] = layout
+
+    # Views that share an axis stay aligned: RIGHT SIDE VIEW moves along x only, TOP VIEW along y only
+    sheet = GridIndex(cell_size(scale))
+    anchors = {}
+    for view in views:
+        x0, y0, x1, y1 = boxes[view]
+        if not anchors:
+            anchors[view] = arrange(layouts[view], sheet, 0.0, 0.0)
+        elif view == 'top' and 'front' in anchors:
+            anchors[view] = arrange(layouts[view], sheet, 0.0, boxes['front'][3] + SPACING - y0, dy=1, step=ARRANGE_STEP)
+        else:
+            right_edge = max(b[2] + anchors[v][0] for v, b in boxes.items() if v in anchors)
+            anchors[view] = arrange(layouts[view], sheet, right_edge + SPACING - x0, 0.0, dx=1, step=ARRANGE_STEP)
+
+    (lo, hi) = mesh.bounds
+    envelope = ' x '.join(f'{v:.2f}' for v in hi - lo)
+    drawing = Drawing(f'{title + " - " if title else ""}envelope {envelope} mm')
+    for view, (visible, hidden_segs) in projected.items():
+        offset = np.array(anchors[view])
+        drawing.add_segments('outline', visible + offset)
+        drawing.add_segments('hidden', hidden_segs + offset)
+        layouts[view].emit(drawing, *offset)
+
+    all_boxes = np.array(sheet.boxes)
+    drawing.limits = (all_boxes[:, 0].min() - PADDING, all_boxes[:, 2].max() + PADDING,
+                      all_boxes[:, 1].min() - PADDING, all_boxes[:, 3].max() + PADDING)
+    return drawing, timings
+
+
+def write_projection(drawing, output, dpi=150):
+    """Writes a Drawing as .svg/.dxf (vector_writer) or through matplotlib (.png, .pdf, ...)."""
+    from vector_writer import WRITERS, write_drawing
+
+    if os.path.splitext(output)[1].lower() in WRITERS:
+        write_drawing(drawing, output)
+        return
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    # No pyplot: nothing is registered globally, so repeated calls do not pile up figures
+    fig = Figure(figsize=FIGSIZE)
+    FigureCanvasAgg(fig)
+    drawing.draw(fig.add_subplot())
+    fig.savefig(output, bbox_inches='tight', dpi=dpi)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Three-view drawing of an STL mesh with hidden lines.')
+    parser.add_argument('stl', help='binary or ASCII .stl file')
+    parser.add_argument('-o', '--output', help='.png, .pdf, .svg or .dxf (default: <stl name>_three_view.png)')
+    parser.add_argument('--views', nargs='+', choices=list(VIEWS), default=['front', 'top', 'right'])
+    parser.add_argument('--crease', type=float, default=DEFAULT_CREASE, help='feature edge angle in degrees')
+    parser.add_argument('--tolerance', type=float, help='classification piece length in mm')
+    parser.add_argument('--no-hidden', dest='hidden', action='store_false', help='leave hidden lines out')
+    parser.add_argument('--dpi', type=int, default=150)
+    args = parser.parse_args()
+
+    name = os.path.splitext(os.path.basename(args.stl))[0]
+    output = args.output or f'{name}_three_view.png'
+    t0 = time.perf_counter()
+    mesh = Mesh(read_stl(args.stl))
+    t1 = time.perf_counter()
+    drawing, timings = build_projection_drawing(mesh, args.views, args.tolerance, args.crease, args.hidden, name)
+    t2 = time.perf_counter()
+    write_projection(drawing, output, args.dpi)
+    t3 = time.perf_counter()
+    print(f'{args.stl}: {len(mesh)} triangles, {len(mesh.edges)} edges, read in {t1 - t0:.2f} s')
+    for view, seconds in timings.items():
+        print(f'  {VIEW_TITLES[view]:16} {seconds:.2f} s')
+    print(f'Drawing saved as {output} ({len(drawing.segments("outline"))} visible, '
+          f'{len(drawing.segments("hidden"))} hidden segments; layout {t2 - t1 - sum(timings.values()):.2f} s, '
+          f'write {t3 - t2:.2f} s)')
@@ -0,0 +1,215 @@
+"""NumPy ISO metric thread meshes written straight to binary STL.
+
+Builds the same solid as metric_thread() in threads.scad (ISO 60 degree
+V-thread, same segments(diameter) rule, internal/external clearances,
+leadin chamfers, n_starts) without OpenSCAD's polyhedron-per-segment CSG.
+
+A stepped shaft is star-shaped around its axis, so the whole part is one
+radius field r(z, theta) sampled on a grid of rings:
+    - plain sections contribute two rings (start and end),
+    - threaded sections contribute one ring every lead/n_segments of z,
+      with the radius taken from the thread profile at the helix phase
+      (z - theta * lead / 2pi) mod pitch,
+    - neighbouring sections meet in two rings at the same z (the step face).
+The rings are joined by quads and closed by two end-cap fans, which gives
+a watertight mesh by construction. Every step is an array operation.
+
+Internal threads produce the "cutter" solid that metric_thread(internal=true)
+makes; import the STL and subtract it in OpenSCAD.
+
+Usage:
+    python thread_mesh.py stepped_cylinder.stl                  # shaft from sections_data
+    python thread_mesh.py m10.stl --thread M10x1.25 --length 7.5 --internal
+"""
+import argparse
+import math
+import re
+import time
+
+import numpy as np
+
+ANGLE = 30.0      # thread flank angle from perpendicular to the axis (degrees)
+DEFAULT_FN = 50   # $fn of the plain sections (stepped_cylinder.scad)
+
+THREAD_LABEL = re.compile(r'M\s*([\d.]+)\s*[xX×]\s*([\d.]+)')
+
+
+def segments(diameter):
+    """Same rule as segments() in threads.scad."""
+    return min(150, max(math.ceil(diameter * 6), 25))
+
+
+def thread_pitch(label):
+    """Pitch in mm from a thread callout such as 'M10x1.25'."""
+    match = THREAD_LABEL.search(label or '')
+    if not match:
+        raise ValueError(f'Cannot read a metric thread pitch from {label!r}')
+    return float(match.group(2))
+
+
+def thread_radius(z, theta, diameter, pitch, length, internal=False, n_starts=1, leadin=0, leadfac=1.0):
+    """Radius of metric_thread() at local heights z (rows) and angles theta (columns).
+
+    Returns an array of shape (len(z), len(theta)).
+    """
+    r = diameter / 2
+    tan_a = math.tan(math.radians(ANGLE))
+    h = pitch / (2 * tan_a)
+    outer_r = r + (h / 20 if internal else 0)   # internal relief
+    inner_r = r - h * 0.875
+    z0_outer = (outer_r - inner_r) * tan_a      # axial width of one flank
+    core_r = r - h * (0.625 if internal else 5.3 / 8)  # Dmin truncation
+    lead = n_starts * pitch
+
+    z = np.asarray(z, dtype=float)[:, None]
+    phase = np.mod(z - theta[None, :] * (lead / (2 * np.pi)), pitch)
+    flank = np.clip(np.minimum(phase, pitch - phase) / z0_outer, 0.0, 1.0)
+    radius = np.maximum(core_r, inner_r + (outer_r - inner_r) * flank)
+
+    # Leadin chamfers (45 degrees): 1 = max-z end, 2 = both ends, 3 = z=0 end
+    c = h * 0.625 * leadfac
+    z_top = length + 0.05 - c
+    if internal:
+        # Internal lead-in adds a cone to the cutter
+        if leadin in (2, 3):
+            radius = np.where(z <= c, np.maximum(radius, r - h + c - z), radius)
+        if leadin in (1, 2):
+            radius = np.where(z >= z_top, np.maximum(radius, r - h + (z - z_top)), radius)
+    else:
+        if leadin in (2, 3):
+            radius = np.minimum(radius, r - c + z)
+        if leadin in (1, 2):
+            radius = np.minimum(radius, r - np.maximum(z - z_top, 0.0))
+    return radius
+
+
+def section_rings(sections_data, n, internal=False, n_starts=1, leadin=0, leadfac=1.0):
+    """Returns ring heights (R,) and radii (R, n) for a sections_data table."""
+    theta = 2 * np.pi * np.arange(n) / n
+    z_blocks, r_blocks = [], []
+    for length, d_major, d_minor, start_z, threaded, label in sections_data:
+        if threaded:
+            pitch = thread_pitch(label)
+            rows = max(2, math.ceil(length / (n_starts * pitch / n)) + 1)
+            z = np.linspace(0.0, length, rows)
+            radius = thread_radius(z, theta, d_major, pitch, length, internal, n_starts, leadin, leadfac)
+        else:
+            z = np.array([0.0, length])
+            radius = np.full((2, n), d_major / 2)
+        z_blocks.append(start_z + z)
+        r_blocks.append(radius)
+    z = np.concatenate(z_blocks)
+    radius = np.concatenate(r_blocks)
+
+    # Drop rings that repeat the previous one (no step between equal sections)
+    keep = np.ones(len(z), dtype=bool)
+    keep[1:] = (np.diff(z) != 0) | np.any(radius[1:] != radius[:-1], axis=1)
+    return z[keep], radius[keep]
+
+
+def ring_mesh(z, radius):
+    """Joins rings into a closed mesh; returns vertices (V, 3) and triangles (F, 3)."""
+    rows, n = radius.shape
+    theta = 2 * np.pi * np.arange(n) / n
+    ring_vertices = np.stack([radius * np.cos(theta), radius * np.sin(theta),
+                              np.broadcast_to(z[:, None], radius.shape)], axis=-1).reshape(-1, 3)
+    vertices = np.concatenate([ring_vertices, [[0.0, 0.0, z[0]], [0.0, 0.0, z[-1]]]])
+    bottom, top = len(ring_vertices), len(ring_vertices) + 1
+
+    # Quads between ring j and j+1, columns i and i+1 (wrapping)
+    j, i = np.meshgrid(np.arange(rows - 1), np.arange(n), indexing='ij')
+    a = j * n + i
+    b = j * n + (i + 1) % n
+    c = b + n
+    d = a + n
+    sides = np.concatenate([np.stack([a, b, c], axis=-1).reshape(-1, 3),
+                            np.stack([a, c, d], axis=-1).reshape(-1, 3)])
+
+    # End caps: fans to the axis, normals pointing out of the part
+    i = np.arange(n)
+    last = (rows - 1) * n
+    caps = np.concatenate([
+        np.stack([np.full(n, bottom), (i + 1) % n, i], axis=-1),
+        np.stack([np.full(n, top), last + i, last + (i + 1) % n], axis=-1),
+    ])
+    return vertices, np.concatenate([sides, caps])
+
+
+def shaft_mesh(sections_data, fn=DEFAULT_FN, n_segments=None, internal=False, n_starts=1, leadin=0, leadfac=1.0):
+    """Mesh of a stepped shaft with metric threads on its threaded sections.
+
+    All rings share one segment count: n_segments if given, otherwise the
+    largest of fn and segments(d) of every threaded section.
+    """
+    if n_segments is None:
+        n_segments = max([fn] + [segments(s[1]) for s in sections_data if s[4]])
+    z, radius = section_rings(sections_data, n_segments, internal, n_starts, leadin, leadfac)
+    return ring_mesh(z, radius)
+
+
+def metric_thread_mesh(diameter=8, pitch=1, length=1, internal=False, n_starts=1, leadin=0, leadfac=1.0,
+                       n_segments=None):
+    """Mesh of metric_thread(diameter, pitch, length, ...) from threads.scad."""
+    section = [(length, diameter, diameter, 0.0, True, f'M{diameter:g}x{pitch:g}')]
+    n_segments = segments(diameter) if n_segments is None else n_segments
+    z, radius = section_rings(section, n_segments, internal, n_starts, leadin, leadfac)
+    return ring_mesh(z, radius)
+
+
+def is_watertight(faces):
+    """True if every edge is shared by exactly two faces with opposite orientation."""
+    edges = np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]])
+    forward = np.unique(edges, axis=0, return_counts=True)
+    if np.any(forward[1] != 1):
+        return False
+    reverse = np.unique(edges[:, ::-1], axis=0)
+    return len(reverse) == len(forward[0]) and np.array_equal(reverse, forward[0])
+
+
+STL_TRIANGLE = np.dtype([('normal', '<f4', 3), ('vertices', '<f4', (3, 3)), ('attr', '<u2')])
+
+
+def write_stl(path, vertices, faces, header=b'thread_mesh.py'):
+    """Writes a binary STL file."""
+    tri = vertices[faces]
+    normals = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+    records = np.zeros(len(faces), dtype=STL_TRIANGLE)
+    records['normal'] = normals
+    records['vertices'] = tri
+    with open(path, 'wb') as f:
+        f.write(header[:80].ljust(80, b' '))
+        f.write(np.uint32(len(faces)).tobytes())
+        records.tofile(f)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write a metric-threaded part as binary STL.')
+    parser.add_argument('output', help='.stl file to write')
+    parser.add_argument('--thread', help="single thread, e.g. 'M10x1.25' (default: stepped shaft from sections_data)")
+    parser.add_argument('--length', type=float, default=10.0, help='thread length in mm (with --thread)')
+    parser.add_argument('--internal', action='store_true', help='internal thread clearances')
+    parser.add_argument('--n-starts', type=int, default=1)
+    parser.add_argument('--leadin', type=int, default=0, choices=[0, 1, 2, 3])
+    parser.add_argument('--leadfac', type=float, default=1.0)
+    parser.add_argument('--fn', type=int, default=DEFAULT_FN, help='$fn of plain sections')
+    parser.add_argument('--segments', type=int, default=None, help='override the segments(diameter) rule')
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    if args.thread:
+        match = THREAD_LABEL.search(args.thread)
+        if not match:
+            parser.error(f'Cannot read thread callout {args.thread!r}')
+        vertices, faces = metric_thread_mesh(float(match.group(1)), float(match.group(2)), args.length,
+                                             args.internal, args.n_starts, args.leadin, args.leadfac,
+                                             args.segments)
+    else:
+        from stepped_cylinder_three_view_gemini import sections_data
+
+        vertices, faces = shaft_mesh(sections_data, args.fn, args.segments, args.internal,
+                                     args.n_starts, args.leadin, args.leadfac)
+    write_stl(args.output, vertices, faces)
+    print(f'Wrote {args.output}: {len(faces)} triangles in {time.perf_counter() - t0:.2f} s')
@@ -0,0 +1,196 @@
+"""SVG and DXF writers for drafting.Drawing sheets, without matplotlib.
+
+The writers stream a Drawing (profile segments, circles, centerlines,
+dimension lines and labels) straight to a file:
+
+    SVG - one <path> per line style, 1 drawing unit = 1 mm, y axis up.
+    DXF - ASCII R12, one layer per line style, LINE/CIRCLE/TEXT entities.
+          Text is plain ASCII: Ø, ° and ± become the %%c, %%d and %%p control
+          codes, other non-ASCII characters \\U+XXXX escapes. R12 has no units
+          header variable; coordinates are mm.
+
+Segments are formatted with np.savetxt, so the cost per drawing is mostly
+the label count. Matplotlib stays the PNG backend (Drawing.draw()).
+
+Usage:
+    python vector_writer.py stepped_cylinder.svg stepped_cylinder.dxf
+"""
+import os
+import sys
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+import profiling
+from drafting import STYLES, plain_text
+
+PT_TO_MM = 25.4 / 72   # line widths and font sizes are given in points
+SVG_MARGIN = 5.0       # mm around the drawing limits
+
+# matplotlib dash patterns (in line widths) for each linestyle
+DASH_PATTERNS = {'--': (3.7, 1.6), '-.': (6.4, 1.6, 1.0, 1.6), ':': (1.0, 1.65)}
+
+# DXF linetypes: name, description, pattern (mm; positive = dash, negative = gap, 0 = dot)
+DXF_LINETYPES = {
+    '-': ('CONTINUOUS', 'Solid line', ()),
+    '--': ('DASHED', '__ __ __', (3.0, -1.5)),
+    '-.': ('CENTER', '____ _ ____', (6.0, -1.5, 1.0, -1.5)),
+    ':': ('DOT', '. . . .', (0.0, -1.0)),
+}
+
+SVG_ANCHOR = {'left': 'start', 'center': 'middle', 'right': 'end'}
+SVG_BASELINE = {'top': 'hanging', 'center': 'central', 'bottom': 'text-after-edge', 'baseline': 'auto'}
+DXF_HALIGN = {'left': 0, 'center': 1, 'right': 2}
+DXF_VALIGN = {'baseline': 0, 'bottom': 1, 'center': 2, 'top': 3}
+DXF_TEXT_CODES = str.maketrans({'%': '%%%', 'Ø': '%%c', 'ø': '%%c', '°': '%%d', '±': '%%p'})
+
+
+def drawing_bounds(drawing):
+    """Returns (x_min, x_max, y_min, y_max): the drawing limits, or the extent of its geometry."""
+    if drawing.limits:
+        return drawing.limits
+    points = [drawing.segments(style).reshape(-1, 2) for style in drawing.styles()]
+    points += [np.array([[x - r, y - r], [x + r, y + r]]) for x, y, r, _ in drawing.circles]
+    points += [np.array([[x, y]]) for x, y, _, _ in drawing.texts]
+    points = np.concatenate(points) if points else np.zeros((1, 2))
+    (x_min, y_min), (x_max, y_max) = points.min(axis=0), points.max(axis=0)
+    return x_min, x_max, y_min, y_max
+
+
+def _svg_stroke(style):
+    props = STYLES[style]
+    width = props['linewidth'] * PT_TO_MM
+    attrs = f'stroke="black" stroke-width="{width:.3f}" fill="none"'
+    if props['alpha'] != 1.0:
+        attrs += f' stroke-opacity="{props["alpha"]}"'
+    dashes = DASH_PATTERNS.get(props['linestyle'])
+    if dashes:
+        attrs += ' stroke-dasharray="' + ','.join(f'{d * width:.3f}' for d in dashes) + '"'
+    else:
+        attrs += ' stroke-linecap="square"'
+    return attrs
+
+
+def write_svg(drawing, f):
+    """Streams a Drawing to an open text file as SVG (mm units, y up)."""
+    x_min, x_max, y_min, y_max = drawing_bounds(drawing)
+    x_min, y_min = x_min - SVG_MARGIN, y_min - SVG_MARGIN
+    x_max, y_max = x_max + SVG_MARGIN, y_max + SVG_MARGIN
+    width, height = x_max - x_min, y_max - y_min
+    title_h = 8.0 if drawing.title else 0.0
+
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.2f}mm" height="{height + title_h:.2f}mm" '
+            f'viewBox="0 {-title_h:.2f} {width:.2f} {height + title_h:.2f}">\n')
+    if drawing.title:
+        f.write(f'<text x="{width / 2:.2f}" y="{-title_h / 2:.2f}" font-family="sans-serif" font-size="{12 * PT_TO_MM:.2f}" '
+                f'text-anchor="middle" dominant-baseline="central">{escape(plain_text(drawing.title))}</text>\n')
+
+    # Sheet coordinates: x right, y up; SVG: y down
+    flip = np.array([1.0, -1.0])
+    shift = np.array([-x_min, y_max])
+
+    circles = {}
+    for x, y, r, style in drawing.circles:
+        circles.setdefault(style, []).append((x, y, r))
+    for style, items in circles.items():
+        f.write(f'<g class="{style}" {_svg_stroke(style)}>\n')
+        arr = np.array(items)
+        arr[:, :2] = arr[:, :2] * flip + shift
+        np.savetxt(f, arr, fmt='<circle cx="%.3f" cy="%.3f" r="%.3f"/>')
+        f.write('</g>\n')
+
+    for style in drawing.styles():
+        segs = drawing.segments(style) * flip + shift
+        f.write(f'<path class="{style}" {_svg_stroke(style)} d="')
+        np.savetxt(f, segs.reshape(-1, 4), fmt='M%.3f %.3fL%.3f %.3f', newline='')
+        f.write('"/>\n')
+
+    f.write('<g font-family="sans-serif" fill="black">\n')
+    for x, y, text, kw in drawing.texts:
+        sx, sy = x - x_min, y_max - y
+        attrs = (f'x="{sx:.3f}" y="{sy:.3f}" font-size="{kw.get("fontsize", 10) * PT_TO_MM:.2f}" '
+                 f'text-anchor="{SVG_ANCHOR[kw.get("ha", "left")]}" '
+                 f'dominant-baseline="{SVG_BASELINE[kw.get("va", "baseline")]}"')
+        if kw.get('fontweight') == 'bold':
+            attrs += ' font-weight="bold"'
+        if kw.get('rotation'):
+            attrs += f' transform="rotate({-kw["rotation"]:g} {sx:.3f} {sy:.3f})"'
+        f.write(f'<text {attrs}>{escape(plain_text(text))}</text>\n')
+    f.write('</g>\n</svg>\n')
+
+
+def _dxf_pairs(f, *pairs):
+    f.write(''.join(f'{code}\n{value}\n' for code, value in pairs))
+
+
+def dxf_text(text):
+    """A label as R12 TEXT content: plain ASCII with DXF control codes."""
+    text = plain_text(text).translate(DXF_TEXT_CODES)
+    return ''.join(ch if ord(ch) < 128 else f'\\U+{ord(ch):04X}' for ch in text)
+
+
+def _dxf_tables(f, styles):
+    _dxf_pairs(f, (0, 'SECTION'), (2, 'TABLES'))
+    _dxf_pairs(f, (0, 'TABLE'), (2, 'LTYPE'), (70, len(DXF_LINETYPES)))
+    for name, description, pattern in DXF_LINETYPES.values():
+        _dxf_pairs(f, (0, 'LTYPE'), (2, name), (70, 0), (3, description), (72, 65),
+                   (73, len(pattern)), (40, f'{sum(abs(p) for p in pattern):.3f}'),
+                   *((49, f'{p:.3f}') for p in pattern))
+    _dxf_pairs(f, (0, 'ENDTAB'))
+    _dxf_pairs(f, (0, 'TABLE'), (2, 'LAYER'), (70, len(styles)))
+    for style in styles:
+        _dxf_pairs(f, (0, 'LAYER'), (2, style.upper()), (70, 0), (62, 7),
+                   (6, DXF_LINETYPES[STYLES[style]['linestyle']][0]))
+    _dxf_pairs(f, (0, 'ENDTAB'), (0, 'ENDSEC'))
+
+
+def write_dxf(drawing, f):
+    """Streams a Drawing to an open text file as ASCII DXF (R12), in mm."""
+    _dxf_pairs(f, (0, 'SECTION'), (2, 'HEADER'), (9, '$ACADVER'), (1, 'AC1009'), (0, 'ENDSEC'))
+    _dxf_tables(f, list(STYLES))
+    _dxf_pairs(f, (0, 'SECTION'), (2, 'ENTITIES'))
+
+    for style in drawing.styles():
+        layer = style.upper()
+        np.savetxt(f, drawing.segments(style).reshape(-1, 4),
+                   fmt=f'0\nLINE\n8\n{layer}\n10\n%.4f\n20\n%.4f\n11\n%.4f\n21\n%.4f')
+
+    for x, y, r, style in drawing.circles:
+        _dxf_pairs(f, (0, 'CIRCLE'), (8, style.upper()), (10, f'{x:.4f}'), (20, f'{y:.4f}'), (40, f'{r:.4f}'))
+
+    for x, y, text, kw in drawing.texts:
+        halign = DXF_HALIGN[kw.get('ha', 'left')]
+        valign = DXF_VALIGN[kw.get('va', 'baseline')]
+        pairs = [(0, 'TEXT'), (8, 'DIMENSION'), (10, f'{x:.4f}'), (20, f'{y:.4f}'),
+                 (40, f'{kw.get("fontsize", 10) * PT_TO_MM:.3f}'), (1, dxf_text(text))]
+        if kw.get('rotation'):
+            pairs.append((50, f'{kw["rotation"]:g}'))
+        if halign or valign:
+            pairs += [(72, halign), (11, f'{x:.4f}'), (21, f'{y:.4f}'), (73, valign)]
+        _dxf_pairs(f, *pairs)
+
+    _dxf_pairs(f, (0, 'ENDSEC'), (0, 'EOF'))
+
+
+WRITERS = {'.svg': write_svg, '.dxf': write_dxf}
+
+
+def write_drawing(drawing, path):
+    """Writes a Drawing as SVG or DXF, chosen by the file extension."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in WRITERS:
+        raise ValueError(f'Unsupported vector format: {ext} (use .svg or .dxf)')
+    with profiling.phase('save', format=ext.lstrip('.')):
+        with open(path, 'w', encoding='utf-8', newline='\n') as f:
+            WRITERS[ext](drawing, f)
+    profiling.count_written(path)
+
+
+if __name__ == '__main__':
+    from stepped_cylinder_three_view_gemini import build_stepped_drawing, sections_data
+
+    drawing = build_stepped_drawing(sections_data)
+    for path in sys.argv[1:] or ['stepped_threaded_cylinder.svg', 'stepped_threaded_cylinder.dxf']:
+        write_drawing(drawing, path)
+        print(f'Drawing saved as {path}')
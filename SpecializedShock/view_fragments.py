@@ -0,0 +1,235 @@
+"""Incremental sheet rendering from independently cached view fragments.
+
+The three-view drawing of stepped_cylinder_three_view_gemini.py is split
+into four fragments, each rasterized on its own and keyed only by the
+inputs it depends on:
+
+    fv          FRONT VIEW circles and crosshairs   - the set of diameters, the left end diameter
+    rsv         RIGHT SIDE VIEW profile and threads - section lengths, diameters, thread flags
+    tv          TOP VIEW profile and threads        - the same as rsv
+    dimensions  every label and dimension line      - the whole section table and the view anchors
+
+The sheet is assembled by alpha-compositing the fragment rasters on a
+white page. Editing a thread label then re-rasterizes only the dimension
+layer, and a length change leaves the FRONT VIEW alone.
+
+All fragments share one pixel grid: 1 drawing unit = dpi / 72 /
+text_units pixels, so text and line widths come out at their point size,
+and view anchors are snapped to whole pixels (a shift of at most half a
+pixel, applied to geometry and annotations alike) so that a view's raster
+does not depend on where the view lands on the sheet.
+
+Fragment rasters are kept in memory (for an interactive session) and in
+the render cache directory (see render_cache.py).
+
+Usage:
+    python view_fragments.py -o preview.png --dpi 150
+    python view_fragments.py part.scad -o preview.png
+"""
+import argparse
+import copy
+import io
+import json
+import math
+import time
+from collections import OrderedDict
+
+import dimension_layout
+import drafting
+import stepped_cylinder_three_view_gemini
+import stepped_geometry
+from render_cache import cache_key, default_cache, source_digest
+from stepped_cylinder_three_view_gemini import VIEW_DRAWINGS, default_text_units, dimension_drawing, layout_sheet
+from stepped_geometry import SectionTable
+from vector_writer import drawing_bounds
+
+FRAGMENTS = ['fv', 'rsv', 'tv', 'dimensions']
+SOURCES = [stepped_cylinder_three_view_gemini.__file__, dimension_layout.__file__, drafting.__file__,
+           stepped_geometry.__file__, __file__]
+MARGIN_POINTS = 3.0     # room around a view's geometry for line widths and caps
+MEMORY_FRAGMENTS = 64   # fragment rasters kept in memory
+SCALE_STEPS = 4         # text scales per octave; small edits keep the same pixel grid
+TITLE = 'Complete Dimensioned Drawing of Stepped Threaded Cylinder'
+TITLE_FONTSIZE = 12
+
+
+def fragment_inputs(name, sections_data):
+    """The part of the section table a fragment depends on."""
+    rows = [tuple(row[:5]) for row in sections_data]  # without the thread labels
+    if name == 'fv':
+        return {'diameters': sorted(set(row[1] for row in rows)), 'left': rows[0][1]}
+    if name in ('rsv', 'tv'):
+        return {'sections': rows}
+    return {'sections': [tuple(row) for row in sections_data]}
+
+
+class FragmentCache:
+    """Fragment rasters by key, in memory and in a RenderCache directory.
+
+    An entry is (image, box): a PIL RGBA image and the (x0, y0, x1, y1) box
+    it covers in the fragment's own coordinates.
+    """
+
+    def __init__(self, cache=None, max_items=MEMORY_FRAGMENTS):
+        self.cache = cache
+        self.max_items = max_items
+        self.memory = OrderedDict()
+
+    def get(self, key):
+        from PIL import Image
+
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key]
+        path = self.cache.get(key, 'png') if self.cache else None
+        if path is None:
+            return None
+        with Image.open(path) as image:
+            image.load()
+            box = tuple(json.loads(image.text['box']))
+        return self._remember(key, (image, box))
+
+    def put(self, key, image, box):
+        from PIL.PngImagePlugin import PngInfo
+
+        if self.cache:
+            info = PngInfo()
+            info.add_text('box', json.dumps(box))
+            data = io.BytesIO()
+            image.save(data, format='PNG', pnginfo=info)
+            self.cache.put_bytes(key, 'png', data.getvalue())
+        return self._remember(key, (image, box))
+
+    def _remember(self, key, entry):
+        self.memory[key] = entry
+        while len(self.memory) > self.max_items:
+            self.memory.popitem(last=False)
+        return entry
+
+
+def preview_text_units(table):
+    """The default text scale rounded up to one of SCALE_STEPS steps per octave."""
+    return 2 ** (math.ceil(math.log2(default_text_units(table)) * SCALE_STEPS) / SCALE_STEPS)
+
+
+def rasterize(drawing, box, px_per_unit, dpi):
+    """Renders a Drawing's items inside box (x0, y0, x1, y1; whole pixels) as a transparent RGBA image.
+
+    The Drawing itself is left as it is; the title and limits are set on a shallow copy.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from PIL import Image
+
+    x0, y0, x1, y1 = box
+    width, height = round((x1 - x0) * px_per_unit), round((y1 - y0) * px_per_unit)
+    figure = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    figure.patch.set_alpha(0.0)
+    canvas = FigureCanvasAgg(figure)
+    ax = figure.add_axes((0, 0, 1, 1))
+    ax.patch.set_visible(False)
+    drawing = copy.copy(drawing)
+    drawing.title = None
+    drawing.limits = (x0, x1, y0, y1)
+    drawing.draw(ax)
+    canvas.draw()
+    image = Image.frombuffer('RGBA', canvas.get_width_height(), canvas.buffer_rgba(), 'raw', 'RGBA', 0, 1)
+    if image.size != (width, height):  # figure sizes are rounded to whole pixels
+        image = image.crop((0, 0, width, height))
+    return image.copy()
+
+
+def snap(value, px_per_unit):
+    return round(value * px_per_unit) / px_per_unit
+
+
+def outward(box, px_per_unit, margin):
+    """Grows a box by margin and rounds it outward to the pixel grid."""
+    x0, y0, x1, y1 = box
+    return (math.floor((x0 - margin) * px_per_unit) / px_per_unit, math.floor((y0 - margin) * px_per_unit) / px_per_unit,
+            math.ceil((x1 + margin) * px_per_unit) / px_per_unit, math.ceil((y1 + margin) * px_per_unit) / px_per_unit)
+
+
+def paste(canvas, image, left, top):
+    """Alpha-composites image onto canvas at (left, top), clipped to the canvas."""
+    crop = (max(-left, 0), max(-top, 0), min(image.width, canvas.width - left), min(image.height, canvas.height - top))
+    if crop[0] < crop[2] and crop[1] < crop[3]:
+        canvas.alpha_composite(image.crop(crop), (left + crop[0], top + crop[1]))
+
+
+def fragment_drawing(name, sheet):
+    """Drawing of one fragment: a view in its local coordinates, or the dimension layer on the sheet."""
+    if name != 'dimensions':
+        return VIEW_DRAWINGS[name](sheet.table)
+    drawing = dimension_drawing(sheet)
+    x_min, x_max, _, y_max = sheet.limits
+    drawing.add_text((x_min + x_max) / 2, y_max, TITLE, ha='center', va='bottom', fontsize=TITLE_FONTSIZE)
+    return drawing
+
+
+def render_composed(output_path, sections_data, dpi=150, text_units=None, fragments=None):
+    """Writes the sheet for sections_data to output_path, composed from cached fragments.
+
+    text_units defaults to preview_text_units(). fragments is a
+    FragmentCache (by default one on the configured render cache).
+    Returns {fragment name: 'hit' or 'miss'}.
+    """
+    from PIL import Image
+
+    fragments = FragmentCache(default_cache()) if fragments is None else fragments
+    scale = text_units or preview_text_units(SectionTable(sections_data))  # drawing units per point
+    sheet = layout_sheet(sections_data, scale)
+    px_per_unit = dpi / 72 / scale
+    sheet.anchors = {view: (snap(x, px_per_unit), snap(y, px_per_unit)) for view, (x, y) in sheet.anchors.items()}
+
+    # Page: the sheet limits plus a strip for the title, on the pixel grid
+    x_min, x_max, y_min, y_max = sheet.limits
+    title_height = dimension_layout.LINE_HEIGHT * TITLE_FONTSIZE * scale
+    page = outward((x_min, y_min, x_max, y_max + title_height), px_per_unit, 0.0)
+
+    style = {'lines': drafting.STYLES, 'px_per_unit': px_per_unit, 'source': source_digest(SOURCES)}
+    status = {}
+    width, height = round((page[2] - page[0]) * px_per_unit), round((page[3] - page[1]) * px_per_unit)
+    canvas = Image.new('RGBA', (width, height), 'white')
+    for name in FRAGMENTS:
+        inputs = fragment_inputs(name, sections_data)
+        if name == 'dimensions':
+            inputs.update(anchors=sheet.anchors, page=page, scale=scale)
+            offset = (0.0, 0.0)
+        else:
+            offset = sheet.anchors[name]
+        key = cache_key(dict(inputs, fragment=name), style, dpi, 'png')
+        entry = fragments.get(key)
+        status[name] = 'hit' if entry else 'miss'
+        if entry is None:
+            drawing = fragment_drawing(name, sheet)
+            if name == 'dimensions':
+                box = page
+            else:
+                x0, x1, y0, y1 = drawing_bounds(drawing)
+                box = outward((x0, y0, x1, y1), px_per_unit, MARGIN_POINTS * scale)
+            entry = fragments.put(key, rasterize(drawing, box, px_per_unit, dpi), box)
+
+        # Image rows run top down from the page's top edge
+        image, (x0, _, _, y1) = entry
+        paste(canvas, image, round((x0 + offset[0] - page[0]) * px_per_unit), round((page[3] - y1 - offset[1]) * px_per_unit))
+    canvas.convert('RGB').save(output_path, dpi=(dpi, dpi))
+    return status
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Render the stepped cylinder sheet from cached view fragments.')
+    parser.add_argument('scad', nargs='?', help='draw the sections of a .scad model instead of the built-in table')
+    parser.add_argument('-o', '--output', default='stepped_threaded_cylinder_preview.png')
+    parser.add_argument('--dpi', type=int, default=150)
+    args = parser.parse_args()
+
+    sections = stepped_cylinder_three_view_gemini.sections_data
+    if args.scad:
+        from scad_sections import extract_sections
+
+        sections = extract_sections(args.scad)
+    t0 = time.perf_counter()
+    status = render_composed(args.output, sections, args.dpi)
+    elapsed = (time.perf_counter() - t0) * 1000
+    print(f'{args.output}: {", ".join(f"{name} {hit}" for name, hit in status.items())} ({elapsed:.0f} ms)')